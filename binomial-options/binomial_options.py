@@ -15,317 +15,543 @@ Description:
     option trees and compute their values. 
 """
 
-from a7task1 import *
-from a4task1 import print_matrix
+from collections import OrderedDict
+from binomial_tree import *
+from matrix_util import print_matrix, TriangularMatrix
+from lattice_option import LatticeOption
+import numpy as np
+from scipy.special import gammaln, ndtr
 
-class BinomialOption(BinomialTree):
+# Lattices supported by the option classes: the forward tree of BinomialTree,
+# the Leisen-Reimer tree and the binomial Black-Scholes tree with Richardson
+# extrapolation (Broadie and Detemple)
+LATTICES = {'forward', 'lr', 'bbsr'}
+
+def forward_lattice_params(stdev, rf, div, t, nper):
     """
-    Create a class named Binomial Option. This is
-    a sub-class of BinomialTree from Task 1. 
+    Compute h, u, d, p* and the one-period discount factor of the forward
+    tree used by BinomialTree. The inputs may be np.arrays.
     """
-    def __init__(self, s, x, stdev, rf, div, t, nper):
-        """
-        Initialize an instance of BinomialOption
-        """
-        # Call super-class constructor. 
-        super().__init__(s, stdev, rf, div, t, nper)
-        self.x = x
-        self.build_option_tree()
+    h = t / nper
+    d = np.exp((rf - div) * h - stdev * np.sqrt(h))
+    u = np.exp((rf - div) * h + stdev * np.sqrt(h))
+    pStar = (np.exp((rf - div) * h) - d) / (u - d)
+    discount = np.exp(-rf * h)
+    return h, u, d, pStar, discount
 
 
-class BinomialEuroCallOption(BinomialOption):
-    """ 
-    Create a class named BinomialEuroCallOption. This is
-    a sub-class of BinomialOption above.
+def leisen_reimer_params(s, x, stdev, rf, div, t, nper):
     """
-    def __repr__(self):
-        """
-        Create a beautifully-formatted representation for the
-        BinomialEuroCallOption instance. 
-        """
-        newstr = ""
-        newstr += "European Call Option Tree "
-        newstr += (
-            f"(s={self.s}, x={self.x}, stdev={self.stdev}, rf={self.rf}, div={self.div}, "
-        )
-        newstr += f"t={self.years} years, nper={self.nper}) \n"
-        
-        #Iterate over self.option_tree to display its contents on the console. 
-        # Only print the values at and above the left diagonal.
-        for i in range(len(self.tree[0])):
-            for j in range(len(self.tree[i])):
-                if (self.option_tree[i][j] != 0):
-                    newstr += f"{self.option_tree[i][j]:8.2f} "
-                elif (self.option_tree[i][j] == 0 and (i<=j)):
-                    newstr += f"{self.option_tree[i][j]:8.2f} "
-                else:
-                    newstr += "         "
-            newstr += f"\n"
-        return newstr
+    Compute h, u, d, p* and the one-period discount factor of the
+    Leisen-Reimer tree, which centers the lattice on the strike and
+    converges much faster (and without oscillation) than the forward tree.
+    Odd values of nper work best. The inputs may be np.arrays.
+    """
+    h = t / nper
+    d1 = (np.log(s / x) + (rf - div + stdev ** 2 / 2) * t) / (stdev * np.sqrt(t))
+    d2 = d1 - stdev * np.sqrt(t)
+    
+    def peizer_pratt(z):
+        # Peizer-Pratt inversion of the normal cdf into a binomial probability
+        q = z / (nper + 1 / 3 + 0.1 / (nper + 1))
+        return 0.5 + np.sign(z) * 0.5 * np.sqrt(1 - np.exp(-q ** 2 * (nper + 1 / 6)))
+    
+    pStar = peizer_pratt(d2)
+    growth = np.exp((rf - div) * h)
+    u = growth * peizer_pratt(d1) / pStar
+    d = (growth - pStar * u) / (1 - pStar)
+    discount = np.exp(-rf * h)
+    return h, u, d, pStar, discount
 
-    def build_option_tree(self):
-        """
-        Calculate the option value at each node of the Option tree. 
-        Save it as a data attribute 'option_tree.' 
-        """
-        # Calculate h
-        h = self.years / self.nper
-        # Calculate d
-        d = math.e ** ((self.rf - self.div) * h - self.stdev * math.sqrt(h))
-        # Calculate u
-        u = math.e ** ((self.rf - self.div) * h + self.stdev * math.sqrt(h))
-        # Calculate the probability 'p*'
-        pStar = ((math.e ** ((self.rf - self.div) * h)) - d) / (u - d)
-        # Initialize a new tree by calling the super-class buid_tree method. 
-        newLst = self.build_tree()
-        
-        # Iterate over every element, beginning from the rightmost col 
-        # and going from right to left. 
-        for col in range(len(newLst[0]) - 1, -1, -1):
-            for row in range(0, col+1):
-                if (col == len(newLst[0]) - 1):
-                    # If at the rightmost column, 
-                    # calculate p and assign it to the current element. 
-                    p = max(newLst[row][col] - self.x, 0)
-                    newLst[row][col] = p
+
+def bsm_values(prices, x, stdev, rf, div, t, call):
+    """
+    Compute Black-Scholes-Merton values of European options for an array of
+    underlying prices. Used for the last step of the binomial Black-Scholes
+    tree.
+    """
+    sigmaRootT = stdev * np.sqrt(t)
+    d1 = (np.log(prices / x) + (rf - div + stdev ** 2 / 2) * t) / sigmaRootT
+    d2 = d1 - sigmaRootT
+    if call:
+        return prices * np.exp(-div * t) * ndtr(d1) - x * np.exp(-rf * t) * ndtr(d2)
+    return x * np.exp(-rf * t) * ndtr(-d2) - prices * np.exp(-div * t) * ndtr(-d1)
+
+
+def binomial_rollback(s, u, d, pStar, discount, nper, payoff, early_exercise, terminal = None,
+                      keep_levels = False, boundary = None, call = False, num_levels = 3):
+    """
+    Run backward induction on the binomial lattice and return the option
+    value(s) at Time 0. s, u, d, pStar and discount are scalars or 1-D
+    np.arrays (one entry per contract); only one time level of the lattice
+    is kept, as a (nodes x contracts) np.array. payoff maps an array of
+    underlying prices to exercise values. terminal, if given, maps the prices
+    at level nper to option values instead of payoff. If keep_levels is
+    True, return a list with the option values of the first num_levels
+    levels (0, 1 and 2 by default) instead.
+    If boundary is a np.array with one row per level, the critical stock
+    price of each level (the highest price where a put is exercised early,
+    or the lowest for a call) is recorded in it, NaN where there is none.
+    """
+    s, u, d, pStar, discount = [np.asarray(a, dtype = float) for a in (s, u, d, pStar, discount)]
+    
+    # Underlying prices at maturity: node j has j down moves
+    numDims = max(np.ndim(a) for a in (s, u, d))
+    downs = np.arange(nper + 1).reshape((-1,) + (1,) * numDims)
+    prices = np.exp(np.log(s) + (nper - downs) * np.log(u) + downs * np.log(d))
+    values = payoff(prices) if terminal is None else terminal(prices)
+    downProb = 1 - pStar
+    temp = np.empty_like(values)
+    
+    # The first levels of the tree, kept for the lattice Greeks and printing
+    levels = [None] * (min(nper, num_levels - 1) + 1)
+    if keep_levels and nper < num_levels:
+        levels[nper] = values.copy()
+    
+    # Roll the values back one level at a time. Level col only uses the first
+    # col+1 nodes, so the arrays are updated in place on shrinking views.
+    for col in range(nper - 1, -1, -1):
+        level = values[:col + 1]
+        down = np.multiply(values[1:col + 2], downProb, out = temp[:col + 1])
+        level *= pStar
+        level += down
+        level *= discount
+        if early_exercise:
+            # Node prices one level earlier are the upper nodes divided by u
+            levelPrices = prices[:col + 1]
+            levelPrices /= u
+            exercise = payoff(levelPrices)
+            if boundary is not None:
+                # Nodes where exercising now beats holding on
+                exercised = (exercise > level) & (exercise > 0)
+                if call:
+                    critical = np.where(exercised, levelPrices, np.inf).min(axis = 0)
                 else:
-                    # Otherwise, use the formula below to compute p 
-                    p = (math.exp((-self.rf * h))) * (pStar * newLst[row][col+1] + 
-                                                      (1 - pStar) * newLst[row+1][col+1])
-                    newLst[row][col] = p
-        self.option_tree = newLst
-        return self.option_tree
+                    critical = np.where(exercised, levelPrices, -np.inf).max(axis = 0)
+                boundary[col] = np.where(np.isinf(critical), np.nan, critical)
+            np.maximum(level, exercise, out = level)
+        if keep_levels and col < num_levels:
+            levels[col] = level.copy()
+    
+    if keep_levels:
+        return levels
+    return values[0]
+
 
-    def set_s(self, newVal):
+def price_american_options(s, x, stdev, rf, div, t, nper, call = False, lattice = 'forward'):
+    """
+    Price a batch of American options (puts by default, calls if call is
+    True) in one pass of backward induction. s, x, stdev, rf, div and t are
+    np.arrays (or scalars, which are broadcast) with one entry per contract;
+    nper is shared by all contracts. lattice is 'forward' or 'lr'. Return a
+    np.array of values at Time 0.
+    """
+    s, x, stdev, rf, div, t = np.broadcast_arrays(*[np.asarray(a, dtype = float)
+                                                     for a in (s, x, stdev, rf, div, t)])
+    assert lattice in {'forward', 'lr'}, "Batch lattice must be 'forward' or 'lr'. "
+    
+    # Lattice parameters for every contract
+    if lattice == 'lr':
+        h, u, d, pStar, discount = leisen_reimer_params(s, x, stdev, rf, div, t, nper)
+    else:
+        h, u, d, pStar, discount = forward_lattice_params(stdev, rf, div, t, nper)
+    
+    # Exercise values, with the contracts along the last axis
+    if call:
+        payoff = lambda prices: np.maximum(prices - x, 0)
+    else:
+        payoff = lambda prices: np.maximum(x - prices, 0)
+    return binomial_rollback(s, u, d, pStar, discount, nper, payoff, True)
+
+
+class BinomialOption(LatticeOption, BinomialTree):
+    """
+    Create a class named Binomial Option. This is
+    a sub-class of BinomialTree from Task 1, with the option layer
+    shared with TrinomialOption coming from LatticeOption. 
+    """
+    # Whether the payoff is that of a call (used by the 'bbsr' lattice)
+    call = False
+    # Volatility and interest rate bumps used for vega and rho
+    vega_bump = 0.01
+    rho_bump = 0.0001
+    # Number of parameter sets whose early-exercise boundary is kept
+    boundary_cache_size = 32
+    # Name used by __repr__
+    label = "Binomial Option"
+
+    # The lattice can be updated along with the strike and tree parameters
+    params = dict(LatticeOption.params,
+                  lattice = ((str,), "Lattice must be 'forward', 'lr' or 'bbsr'. "))
+
+    def __init__(self, s, x, stdev, rf, div, t, nper, lattice = 'forward'):
         """
-        Modify the initial underlying to be equal to newVal
+        Initialize an instance of BinomialOption. lattice selects the tree:
+        'forward' (the BinomialTree tree), 'lr' (Leisen-Reimer) or 'bbsr'
+        (binomial Black-Scholes with Richardson extrapolation).
         """
-        super().set_s(newVal)
-        self.build_option_tree()
-        
-    def set_stdev(self, newVal):
+        assert lattice in LATTICES, "Lattice must be 'forward', 'lr' or 'bbsr'. "
+        # Call super-class constructor. 
+        super().__init__(s, x, stdev, rf, div, t, nper)
+        self.lattice = lattice
+        # Early-exercise boundaries, keyed by parameter set, least recently
+        # used first
+        self._boundaries = OrderedDict()
+
+    def check_param(self, name, newVal):
         """
-        Set the standard deviation to newVal
+        Check a value passed to update(); the lattice must also be one of
+        LATTICES
         """
-        super().set_stdev(newVal)
-        self.build_option_tree()
-        
-    def set_nper(self, newVal):
+        super().check_param(name, newVal)
+        if name == 'lattice':
+            assert newVal in LATTICES, "Lattice must be 'forward', 'lr' or 'bbsr'. "
+
+    def compute_lattice_params(self):
         """
-        Set the number of periods to newVal
+        Calculate h, u, d, p* and the discount factor for the selected
+        lattice. The 'bbsr' lattice uses the forward tree.
         """
-        super().set_nper(newVal)
-        self.build_option_tree()
+        if self.lattice == 'lr':
+            params = leisen_reimer_params(self.s, self.x, self.stdev, self.rf, self.div,
+                                          self.years, self.nper)
+            return tuple(float(p) for p in params)
+        return super().compute_lattice_params()
 
-    def set_rf(self, newVal):
+    def header(self):
         """
-        Set the risk-freee-rate to newVal
+        Return the first line of the printout. The 'bbsr' value is
+        extrapolated from two trees, so the forward tree that is printed
+        (and stored in option_tree) does not give value(); say so.
         """
-        super().set_rf(newVal)
-        self.build_option_tree()
-        
-    def set_x(self, newVal):
+        newstr = super().header()
+        if self.lattice == 'bbsr':
+            newstr += f"(forward tree shown; the 'bbsr' value is {self.value():.2f}) \n"
+        return newstr
+
+    def tree_cells(self, num_cols):
         """
-        Set x to newVal
+        Return the number of rows that hold a node in the first num_cols
+        levels of the option tree and a function giving the text of the
+        node (row, col)
         """
-        assert type(newVal) in {float, int}, "X must be an integer of a float. "
-        self.x = newVal
-        self.build_option_tree()
-        
-    def set_years(self, newVal):
+        levels = self.option_levels(num_cols)
+
+        def cell(row, col):
+            # Only print the values at and above the left diagonal.
+            if row > col:
+                return "         "
+            return f"{levels[col][row]:8.2f} "
+        return num_cols, cell
+
+    def option_levels(self, num_levels):
+        """
+        Return a list with the option values at the first num_levels levels
+        of the option tree. If the tree has not been built, they are recorded
+        during a single backward induction that keeps one level at a time.
+        """
+        num_levels = min(num_levels, self.nper + 1)
+        if self._option_tree is not None:
+            return [self._option_tree.column(col) for col in range(num_levels)]
+        h, u, d, pStar, discount = self.lattice_params()
+        return binomial_rollback(self.s, u, d, pStar, discount, self.nper, self.payoff,
+                                 self.early_exercise, keep_levels = True, num_levels = num_levels)
+
+    def mark_dirty(self):
         """
-        Set the duration to newVal
+        Flag the lattice values, the stored trees and the cached option value
+        as stale, so that they are recomputed on the next value() call
         """
-        assert type(newVal) in {float, int}, "Year must be an integer of a float. "
-        self.years = newVal
-        self.build_option_tree()
-        
+        super().mark_dirty()
+        self._bumps = None
+
     def value(self):
         """
-        Return the value of the option at Time 0
-        """
-        return self.option_tree[0][0]
-        
-    
-class BinomialEuroPutOption(BinomialOption):
-    """
-    Create a class named BinomialEuroPutOption. This is
-    a sub-class of the BinomialOption class created before.
-    """
-    def __repr__(self):
-        newstr = ""
-        newstr += "European Put Option Tree "
-        newstr += (
-            f"(s={self.s}, x={self.x}, stdev={self.stdev}, rf={self.rf}, div={self.div}, "
-        )
-        newstr += f"t={self.years} years, nper={self.nper}) \n"
-        
-        # Iterate over the elements in self.option_tree. Display them in a
-        # diagonal triangle from the leftmost to the rightmost column. 
-        for i in range(len(self.tree[0])):
-            for j in range(len(self.tree[i])):
-                # If at the rigt-most column, use the equation below
-                if (self.option_tree[i][j] != 0):
-                    newstr += f"{self.option_tree[i][j]:8.2f} "
-                # Else if the current element has 0 in it, but its row index
-                # is less than the column index, which means it is within 
-                # the diagonal triangle, use the equation below. 
-                elif (self.option_tree[i][j] == 0 and (i<=j)):
-                    newstr += f"{self.option_tree[i][j]:8.2f} "
-                else:
-                    newstr += "         "
-            newstr += f"\n"
-        return newstr
-            
+        Return the value of the option at Time 0. The value is cached until
+        a parameter changes.
+        """
+        if self._value is None:
+            if self.lattice == 'bbsr':
+                self._value = self.bbsr_value()
+            elif self.early_exercise:
+                self._value = self.rollback_value()
+            else:
+                # Without early exercise, the O(nper) closed form is exact
+                self._value = self.closed_form_value()
+        return self._value
+
     def build_option_tree(self):
         """
         Calculate the option value at each node of the Option tree. 
-        Save it as a data attribute 'option_tree.' 
+        Save it as a data attribute 'option_tree.' Each column of the
+        TriangularMatrix is one time level, computed as a np.array from
+        the column to its right. The 'bbsr' lattice uses the forward tree
+        here, so its Time-0 node differs from value().
         """
-        h = self.years / self.nper
-        d = math.e ** ((self.rf - self.div) * h - self.stdev * math.sqrt(h))
-        u = math.e ** ((self.rf - self.div) * h + self.stdev * math.sqrt(h))
-        pStar = ((math.e ** ((self.rf - self.div) * h)) - d) / (u - d)
-        newLst = self.build_tree()
+        h, u, d, pStar, discount = self.lattice_params()
+        newTree = TriangularMatrix(self.nper + 1)
         
-        # Iterate over the elements in self.tree from the right-most
-        # to the left-most column. 
-        for col in range(len(newLst[0]) - 1, -1, -1):
-            for row in range(0, col+1):
-                # If at the right-most column, use the formula below. 
-                if (col == len(newLst[0]) - 1):
-                    p = max(self.x - newLst[row][col], 0)
-                    newLst[row][col] = p
-                else:
-                    # Else, use the longer formula provided below. 
-                    p = (math.exp((-self.rf * h))) * (pStar * newLst[row][col+1] + 
-                                                   (1 - pStar) * newLst[row+1][col+1])
-                    newLst[row][col] = p
-        self.option_tree = newLst
-        return self.option_tree
-    
+        # At the rightmost column the option is worth its payoff
+        newTree.set_column(self.nper, self.payoff(self.tree.column(self.nper)))
+        
+        # Go from right to left, discounting the expected value of each node
+        for col in range(self.nper - 1, -1, -1):
+            nextValues = newTree.column(col + 1)
+            values = discount * (pStar * nextValues[:-1] + (1 - pStar) * nextValues[1:])
+            if self.early_exercise:
+                values = np.maximum(values, self.payoff(self.tree.column(col)))
+            newTree.set_column(col, values)
+        self._option_tree = newTree
+        return self._option_tree
+
+    def rollback_value(self):
+        """
+        Compute the value of the option at Time 0 by backward induction on a
+        single 1-D np.array holding one time level of the tree at a time,
+        so the memory needed is O(nper) instead of the full option tree.
+        """
+        h, u, d, pStar, discount = self.lattice_params()
+        return float(binomial_rollback(self.s, u, d, pStar, discount, self.nper,
+                                       self.payoff, self.early_exercise))
+
+    def exercise_boundary(self):
+        """
+        Return a np.array with the critical stock price at each time level
+        (0 to nper) of the tree: the price at or below which a put (at or
+        above which a call) is exercised early, NaN where no node is
+        exercised. At maturity it is the strike. Boundaries are cached per
+        parameter set, so repeated queries do not re-run the lattice; the
+        returned array is read-only. The 'bbsr' lattice uses the forward
+        tree here.
+        """
+        assert self.early_exercise, "Only American options have an early-exercise boundary. "
+        key = (self.s, self.x, self.stdev, self.rf, self.div, self.years, self.nper, self.lattice)
+        if key in self._boundaries:
+            self._boundaries.move_to_end(key)
+        else:
+            if self.lattice == 'lr':
+                h, u, d, pStar, discount = self.lattice_params()
+            else:
+                h, u, d, pStar, discount = forward_lattice_params(self.stdev, self.rf, self.div,
+                                                                  self.years, self.nper)
+            boundary = np.full(self.nper + 1, np.nan)
+            boundary[-1] = self.x
+            binomial_rollback(self.s, u, d, pStar, discount, self.nper, self.payoff, True,
+                              boundary = boundary, call = self.call)
+            # The cached array is shared by every caller
+            boundary.flags.writeable = False
             
-    def value(self):
+            # Keep only the most recently used parameter sets
+            if len(self._boundaries) >= self.boundary_cache_size:
+                self._boundaries.popitem(last = False)
+            self._boundaries[key] = boundary
+        return self._boundaries[key]
+
+    def lattice_values(self, stdev, rf, nper, bbs = False, keep_levels = False):
+        """
+        Value the option by backward induction for a scalar or np.array of
+        stdev and rf (all other parameters unchanged) in one batched pass
+        over an nper-step lattice. With bbs, the last step uses the
+        Black-Scholes-Merton value of the option over one period (the
+        binomial Black-Scholes tree). keep_levels is passed on to
+        binomial_rollback.
+        """
+        stdev, rf = np.broadcast_arrays(np.asarray(stdev, dtype = float),
+                                        np.asarray(rf, dtype = float))
+        if self.lattice == 'lr':
+            h, u, d, pStar, discount = leisen_reimer_params(self.s, self.x, stdev, rf, self.div,
+                                                            self.years, nper)
+        else:
+            h, u, d, pStar, discount = forward_lattice_params(stdev, rf, self.div,
+                                                              self.years, nper)
+        if not bbs:
+            return binomial_rollback(self.s, u, d, pStar, discount, nper, self.payoff,
+                                     self.early_exercise, keep_levels = keep_levels)
+        
+        def terminal(prices):
+            # European value over the final period, then the exercise decision
+            values = bsm_values(prices, self.x, stdev, rf, self.div, h, self.call)
+            if self.early_exercise:
+                values = np.maximum(values, self.payoff(prices))
+            return values
+        
+        # The last step is handled by terminal, so roll back from level nper-1
+        # (its nodes are those of level nper-1 of the nper-step tree)
+        return binomial_rollback(self.s, u, d, pStar, discount, nper - 1, self.payoff,
+                                 self.early_exercise, terminal, keep_levels)
+
+    def bbs_value(self, nper):
         """
-        Return the value of the option at Time 0
+        Compute the binomial Black-Scholes value with nper steps: backward
+        induction on the forward tree, except that the last step uses the
+        Black-Scholes-Merton value of the option over one period.
         """
-        return self.option_tree[0][0]
-    
-class BinomialAmericanPutOption(BinomialOption):
-    """
-    Create a beautifully-formatted representation for the
-    BinomialAmericanPutOption instance. 
-    """
-    def __repr__(self):
+        return float(self.lattice_values(self.stdev, self.rf, nper, bbs = True))
+
+    def bbsr_value(self):
         """
-        Create a beautifully-formatted representation for the
-        BinomialAmericanPutOption instance. 
+        Compute the value with the binomial Black-Scholes tree and Richardson
+        extrapolation, 2 * V(nper) - V(nper / 2), which is accurate to about
+        a penny with around 100 steps
         """
-        newstr = ""
-        newstr += "American Put Option Tree "
-        newstr += (
-            f"(s={self.s}, x={self.x}, stdev={self.stdev}, rf={self.rf}, div={self.div}, "
-        )
-        newstr += f"t={self.years} years, nper={self.nper}) \n"
-        
-        # Iterate over every element in the tree and display them on the console, 
-        for i in range(len(self.tree[0])):
-            for j in range(len(self.tree[i])):
-                # If at the rightmost column, use the formula below
-                if (self.option_tree[i][j] != 0):
-                    newstr += f"{self.option_tree[i][j]:8.2f} "
-                elif (self.option_tree[i][j] == 0 and (i<=j)):
-                    newstr += f"{self.option_tree[i][j]:8.2f} "
-                else:
-                    newstr += "         "
-            newstr += f"\n"
-        return newstr
-    
-    def build_option_tree(self):
+        if self.nper < 2:
+            return self.bbs_value(self.nper)
+        return 2 * self.bbs_value(self.nper) - self.bbs_value(self.nper // 2)
+
+    def tree_levels(self):
+        """
+        Return the option values at the first three levels of the tree
+        (levels 0, 1 and 2), from a single backward induction. They are
+        cached until a parameter changes.
+        """
+        if self._levels is None:
+            assert self.nper >= 2 + (self.lattice == 'bbsr'), "Lattice Greeks need more periods. "
+            levels = self.lattice_values(self.stdev, self.rf, self.nper,
+                                         bbs = (self.lattice == 'bbsr'), keep_levels = True)
+            self._levels = [float(levels[0][0]), levels[1], levels[2]]
+            # The same pass also prices the option on the plain lattice
+            if self._value is None and self.lattice != 'bbsr' and self.early_exercise:
+                self._value = self._levels[0]
+        return self._levels
+
+    def delta(self):
         """
-        Calculate the option value at each node of the Option tree. 
-        Save it as a data attribute 'option_tree.' 
+        Return the delta of the option, from the two nodes at level 1
         """
-        h = self.years / self.nper
-        d = math.e ** ((self.rf - self.div) * h - self.stdev * math.sqrt(h))
-        u = math.e ** ((self.rf - self.div) * h + self.stdev * math.sqrt(h))
-        pStar = ((math.e ** ((self.rf - self.div) * h)) - d) / (u - d)
-        newLst = self.build_tree()
-        
-        # Iterate over the elements in self.tree from the rightmost to the
-        # leftmost column. Use the appropriate formulas to compute the value 
-        for col in range(len(newLst[0]) - 1, -1, -1):
-            for row in range(0, col+1):
-                if (col == len(newLst[0]) - 1):
-                    p = max(self.x - newLst[row][col], 0)
-                    newLst[row][col] = p
-                else:
-                    p = max(((math.exp((-self.rf * h))) * (pStar * newLst[row][col+1] + 
-                                                   (1 - pStar) * newLst[row+1][col+1])), self.x - self.tree[row][col])
-                    newLst[row][col] = p
-        self.option_tree = newLst
-        return self.option_tree
-    
-    def set_s(self, newVal):
+        h, u, d, pStar, discount = self.lattice_params()
+        levels = self.tree_levels()
+        return float((levels[1][0] - levels[1][1]) / (self.s * u - self.s * d))
+
+    def gamma(self):
         """
-        Modify the initial underlying to be equal to newVal
+        Return the gamma of the option, from the three nodes at level 2
         """
-        super().set_s(newVal)
-        self.build_option_tree()
-        
-    def set_stdev(self, newVal):
+        h, u, d, pStar, discount = self.lattice_params()
+        levels = self.tree_levels()
+        sUU, sUD, sDD = self.s * u * u, self.s * u * d, self.s * d * d
+        deltaUp = (levels[2][0] - levels[2][1]) / (sUU - sUD)
+        deltaDown = (levels[2][1] - levels[2][2]) / (sUD - sDD)
+        return float((deltaUp - deltaDown) / ((sUU - sDD) / 2))
+
+    def theta(self):
         """
-        Set the standard deviation to newVal
+        Return the theta of the option (per year), from the middle node at
+        level 2 and the root
         """
-        super().set_stdev(newVal)
-        self.build_option_tree()
+        h, u, d, pStar, discount = self.lattice_params()
+        levels = self.tree_levels()
         
-    def set_nper(self, newVal):
+        # The middle node generally sits away from s (e.g. s * e^(2(rf-div)h)
+        # on the forward tree), so remove the delta and gamma effect of that
+        # price change before attributing the rest to the passage of time
+        move = self.s * u * d - self.s
+        change = levels[2][1] - levels[0] - self.delta() * move - self.gamma() * move ** 2 / 2
+        return float(change / (2 * h))
+
+    def bumped_values(self):
+        """
+        Value the option with stdev bumped up and down by vega_bump and rf
+        bumped up and down by rho_bump, all on the same nper-step grid in one
+        batched pass. Cached until a parameter changes.
+        """
+        if self._bumps is None:
+            stdev = self.stdev + np.array([self.vega_bump, -self.vega_bump, 0, 0])
+            rf = self.rf + np.array([0, 0, self.rho_bump, -self.rho_bump])
+            if self.lattice == 'bbsr':
+                self._bumps = (2 * self.lattice_values(stdev, rf, self.nper, bbs = True)
+                               - self.lattice_values(stdev, rf, max(self.nper // 2, 1), bbs = True))
+            else:
+                self._bumps = self.lattice_values(stdev, rf, self.nper)
+        return self._bumps
+
+    def vega(self):
         """
-        Set the number of periods to newVal
+        Return the vega of the option (per 1.00 change in stdev)
         """
-        super().set_nper(newVal)
-        self.build_option_tree()
+        bumps = self.bumped_values()
+        return float((bumps[0] - bumps[1]) / (2 * self.vega_bump))
 
-    def set_rf(self, newVal):
+    def rho(self):
         """
-        Set the risk-freee-rate to newVal
+        Return the rho of the option (per 1.00 change in rf)
         """
-        super().set_rf(newVal)
-        self.build_option_tree()
-        
-    def set_x(self, newVal):
+        bumps = self.bumped_values()
+        return float((bumps[2] - bumps[3]) / (2 * self.rho_bump))
+
+    def closed_form_value(self):
         """
-        Set x to newVal
+        Compute the value at Time 0 of an option without early exercise as
+        the discounted, binomially weighted sum of its payoffs at maturity.
+        The binomial probabilities are computed in log-space, so this is
+        O(nper) and stable for very large nper.
         """
-        assert type(newVal) in {float, int}, "X must be an integer of a float. "
-        self.x = newVal
-        self.build_option_tree()
+        h, u, d, pStar, discount = self.lattice_params()
+        n = self.nper
+        
+        # Log of the probability of reaching each terminal node (j down moves)
+        downs = np.arange(n + 1)
+        logProb = (gammaln(n + 1) - gammaln(downs + 1) - gammaln(n - downs + 1)
+                   + (n - downs) * math.log(pStar) + downs * math.log(1 - pStar))
         
-    def set_years(self, newVal):
+        # Terminal prices, also built in log-space to avoid overflow
+        prices = np.exp(math.log(self.s) + (n - downs) * math.log(u) + downs * math.log(d))
+        return float(discount ** n * np.sum(np.exp(logProb) * self.payoff(prices)))
+
+
+class BinomialEuroCallOption(BinomialOption):
+    """ 
+    Create a class named BinomialEuroCallOption. This is
+    a sub-class of BinomialOption above.
+    """
+    call = True
+    label = "European Call Option"
+
+    def payoff(self, prices):
         """
-        Set the duration to newVal
+        Return the exercise value of the call for a np.array of underlying prices
         """
-        assert type(newVal) in {float, int}, "Year must be an integer of a float. "
-        self.years = newVal
-        self.build_option_tree()
-        
-    def set_div(self, newVal):
+        return np.maximum(prices - self.x, 0)
+
+
+class BinomialEuroPutOption(BinomialOption):
+    """
+    Create a class named BinomialEuroPutOption. This is
+    a sub-class of the BinomialOption class created before.
+    """
+    label = "European Put Option"
+
+    def payoff(self, prices):
         """
-        Set dividend payment to newVal
+        Return the exercise value of the put for a np.array of underlying prices
         """
-        assert type(newVal) in {float, int}, "Dividend must be an integer of a float. "
-        self.years = newVal
-        self.build_option_tree()
-        
-    def value(self):
+        return np.maximum(self.x - prices, 0)
+    
+            
+    
+class BinomialAmericanPutOption(BinomialOption):
+    """
+    Create a beautifully-formatted representation for the
+    BinomialAmericanPutOption instance. 
+    """
+    early_exercise = True
+    label = "American Put Option"
+
+    def payoff(self, prices):
         """
-        Return the value of the option at Time 0
+        Return the exercise value of the put for a np.array of underlying prices
         """
-        return self.option_tree[0][0]
+        return np.maximum(self.x - prices, 0)
     
+
 if __name__=='__main__':
-    pass
+    # The closed-form European value must match backward induction on the lattice
+    for nper in [1, 2, 10, 100, 1000]:
+        for option in [BinomialEuroCallOption(100, 105, 0.3, 0.05, 0.02, 1, nper),
+                       BinomialEuroPutOption(100, 105, 0.3, 0.05, 0.02, 1, nper)]:
+            closedForm = option.closed_form_value()
+            lattice = option.rollback_value()
+            assert abs(closedForm - lattice) < 1e-9, (nper, closedForm, lattice)
+            print(f"{type(option).__name__:24s} nper={nper:5d} {closedForm:12.6f} {lattice:12.6f}")
     
     
     
@@ -17,13 +17,30 @@ Description:
 """
 import math
 from math import e
-from a4task1 import print_matrix
+import io
+import sys
+from matrix_util import print_matrix, TriangularMatrix, write_table
+import numpy as np
 
 class BinomialTree:
     """
     Develops a recombinant binomial tree suitable for any underlying asset
     """
 
+    # Parameters that update() accepts, with their allowed types and the
+    # message shown when a value of the wrong type is given
+    params = {
+        's': ((float, int), "Price must be an integer or a float. "),
+        'stdev': ((float, int), "Standard deviation must be an integer or a float. "),
+        'rf': ((float, int), "Risk free rate must be an integer or a float. "),
+        'div': ((float, int), "Dividend payment must be an integer or a float. "),
+        'years': ((float, int), "Year must be an integer or a float. "),
+        'nper': ((int,), "Periods per year must be an integer value."),
+    }
+    # Rows shown at the top and bottom, and levels shown, by __repr__
+    repr_rows = 10
+    repr_cols = 20
+
     def __init__(self, s, stdev, rf, div, years, nper):
         """
         Initialize the attributes for the BinomialTree object
@@ -34,68 +51,161 @@ class BinomialTree:
         self.div = div
         self.years = years
         self.nper = nper
-        self.build_tree()
+        # Derived values and the price tree are computed when first needed
+        self.mark_dirty()
+
+    @property
+    def tree(self):
+        """
+        Return the binomial price tree (as a TriangularMatrix), building
+        it on first access
+        """
+        if self._tree is None:
+            self.build_tree()
+        return self._tree
+
+    def mark_dirty(self):
+        """
+        Flag the derived lattice values (h, u, d, p* and the discount factor)
+        and the stored tree as stale, so that they are recomputed from the
+        current parameters the next time they are needed
+        """
+        self._dirty = True
+        self._tree = None
+
+    def update(self, **params):
+        """
+        Set several parameters at once, e.g. update(s=100, stdev=0.3), and
+        mark the object dirty once. 't' may be used for 'years'.
+        """
+        if 't' in params:
+            params['years'] = params.pop('t')
+        # Check every value before any attribute is set
+        for name, newVal in params.items():
+            self.check_param(name, newVal)
+        
+        # Only recompute if a value actually changed
+        changed = False
+        for name, newVal in params.items():
+            if getattr(self, name) != newVal:
+                setattr(self, name, newVal)
+                changed = True
+        if changed:
+            self.mark_dirty()
+        return self
+
+    def check_param(self, name, newVal):
+        """
+        Raise an AssertionError if name is not a parameter that update()
+        accepts or newVal does not have one of its allowed types
+        """
+        assert name in self.params, f"Unknown parameter '{name}'. "
+        types, message = self.params[name]
+        assert isinstance(newVal, types), message
 
     def __repr__(self):
         """ 
         Create a beautifully-formatted string representation of
-        the BinomialTree instance
+        the BinomialTree instance. Trees with more levels than
+        repr_rows and repr_cols are truncated.
+        """
+        buffer = io.StringIO()
+        self.write_tree(buffer, head = self.repr_rows, tail = self.repr_rows,
+                        max_cols = self.repr_cols)
+        return buffer.getvalue()
+
+    def header(self):
+        """
+        Return the first line of the printout, with the tree parameters
         """
-        
         newstr = ""
         newstr += "BinomialTree "
         newstr += (
             f"(s={self.s}, stdev={self.stdev}, rf={self.rf}, div={self.div}, "
         )
         newstr += f"t={self.years} years, nper={self.nper}) \n"
-        #Iterate over the self.tree variable, and display the appropriate values
-        #on the console. 
-        for i in range(len(self.tree)):
-            for j in range(len(self.tree[i])):
-                # If the value is 0, do not display on the console. 
-                if self.tree[i][j] != 0:
-                    newstr += f"{self.tree[i][j]:8.2f} "
-                else:
-                    newstr += "         "
-            # New line after every row
-            newstr += f"\n"
         return newstr
 
-    def build_tree(self):
+    def write_tree(self, file = None, head = None, tail = None, max_cols = None):
         """
-        Build a binomial tree (as a 2-d list), which will simulate the
-        price movements of the s asset
+        Write the tree to the file-like object file (sys.stdout by default)
+        one row at a time. head, tail and max_cols limit the printout to the
+        first head and last tail rows and the first max_cols levels; only
+        the displayed nodes are computed.
+        """
+        if file is None:
+            file = sys.stdout
+        file.write(self.header())
+        numCols = self.nper + 1 if max_cols is None else min(self.nper + 1, max_cols)
+        numRows, cell = self.tree_cells(numCols)
+        write_table(file, numRows, self.nper + 1, cell, head, tail, max_cols)
+
+    def tree_cells(self, num_cols):
+        """
+        Return the number of rows that hold a node in the first num_cols
+        levels of the tree and a function giving the text of the node
+        (row, col)
+        """
+        h, u, d, pStar, discount = self.lattice_params()
+        logS, logU, logD = math.log(self.s), math.log(u), math.log(d)
+
+        def cell(row, col):
+            # Nodes below the diagonal do not exist and are left blank
+            if row > col:
+                return "         "
+            return f"{math.exp(logS + (col - row) * logU + row * logD):8.2f} "
+        return num_cols, cell
+
+    def lattice_params(self):
+        """
+        Return the length of one period (h), the up and down factors
+        (u and d), the risk-neutral probability of an up move (p*) and the
+        one-period discount factor. They are cached until the object is
+        marked dirty.
+        """
+        if self._dirty:
+            self._lattice = self.compute_lattice_params()
+            self._dirty = False
+        return self._lattice
+
+    def compute_lattice_params(self):
+        """
+        Calculate h, u, d, p* and the discount factor from the current
+        parameters
         """
-        
         #Calculate h
         h = self.years / self.nper
         #Calculate d
         d = math.e ** ((self.rf - self.div) * h - self.stdev * math.sqrt(h))
         #Calculate u
         u = math.e ** ((self.rf - self.div) * h + self.stdev * math.sqrt(h))
-        # Create a zero-matrix to store the newly computated values. 
-        zerosMatrix = BinomialTree.zeros(self.nper + 1)
+        # Calculate the probability 'p*'
+        pStar = ((math.e ** ((self.rf - self.div) * h)) - d) / (u - d)
+        discount = math.exp(-self.rf * h)
+        return h, u, d, pStar, discount
+
+    def build_tree(self):
+        """
+        Build a binomial tree (as a TriangularMatrix), which will simulate the
+        price movements of the s asset
+        """
         
+        h, u, d, pStar, discount = self.lattice_params()
+        # Create a packed upper-triangular matrix to store the computed values.
+        # Row i of column col is the node with i down moves.
+        tree = TriangularMatrix(self.nper + 1)
         
-        price = self.s
-        prevPrice = price
-        updatedPrice = price    
+        logS, logU, logD = math.log(self.s), math.log(u), math.log(d)
         
-        #Iterate through the zeros matrix. 
-        for row in range(len(zerosMatrix)):            
-            for col in range(row, len(zerosMatrix[row])):
-                # Store the Previous price in the index [row][col]
-                zerosMatrix[row][col] = prevPrice
-                # Perform the computation PreviousPrice * u to find the node on the right. 
-                prevPrice *= u 
-            #Perform the computation updatedPrice * d to find the node on the left. 
-            updatedPrice = updatedPrice * d
-            prevPrice = updatedPrice
+        #Fill the tree one column (time level) at a time.
+        for col in range(self.nper + 1):
+            downs = np.arange(col + 1)
+            tree.set_column(col, np.exp(logS + (col - downs) * logU + downs * logD))
         
-        #Assign the 2-d list to the self.tree variable.
-        self.tree = zerosMatrix
+        #Assign the tree to the self.tree variable.
+        self._tree = tree
         #return the outcome. 
-        return self.tree
+        return self._tree
 
     def zeros(num, num2=None):
         """
@@ -117,49 +227,37 @@ class BinomialTree:
         """
         Modify the initial underlying to be equal to newVal
         """
-        assert type(newVal) in {float, int}, "Price must be an integer or a float. "
-        self.s = newVal
-        self.build_tree()
+        self.update(s = newVal)
         
     def set_stdev(self, newVal):
         """
         Set the standard deviation to newVal
         """
-        assert type(newVal) in {float, int}, "Standard deviation must be an integer or a float. "
-        self.stdev = newVal
-        self.build_tree()
+        self.update(stdev = newVal)
         
     def set_nper(self, newVal):
         """
         Set the num of payments to newVal
         """
-        assert type(newVal) in {int}, "Periods per year must be an integer value."
-        self.nper = newVal
-        self.build_tree()
+        self.update(nper = newVal)
 
     def set_rf(self, newVal):
         """
         Set the risk-free rate to newVal. 
         """
-        assert type(newVal) in {float, int}, "Risk free rate must be an integer or a float. "
-        self.rf = newVal
-        self.build_tree()
+        self.update(rf = newVal)
     
     def set_t(self, newVal):
         """
         Set the number of years to newVal
         """
-        assert type(newVal) in {float, int}, "Year must be an integer or a float. "
-        self.years = newVal
-        self.build_tree()
+        self.update(years = newVal)
         
     def set_div(self, newVal):
         """
         Set the dividend payment to newVal
         """
-        assert type(newVal) in {float, int}, "Dividend payment must be an integer or a float. "
-        self.div = newVal
-        self.build_tree()
+        self.update(div = newVal)
 
     
 if __name__ == "__main__":
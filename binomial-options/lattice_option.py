@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 09:14:52 2026
+
+@author: Tan Aydemir
+@email: taydemir@bu.edu
+Description:
+    The LatticeOption mix-in holds the option layer shared by BinomialOption
+    and TrinomialOption: the strike price x and its setter, the printout
+    header, the lazily built option tree, the cached values that are
+    cleared when a parameter changes and the base payoff. It is combined
+    with a tree class, e.g. class BinomialOption(LatticeOption, BinomialTree).
+"""
+
+import numpy as np
+from binomial_tree import BinomialTree
+
+class LatticeOption:
+    """
+    Mix-in for options priced on a recombinant tree (BinomialTree or
+    TrinomialTree). It must come before the tree class in the bases.
+    """
+    # Whether the option may be exercised before maturity
+    early_exercise = False
+    # Name used by __repr__
+    label = "Lattice Option"
+
+    # The strike price can be updated along with the tree parameters
+    params = dict(BinomialTree.params, x = ((float, int), "X must be an integer of a float. "))
+
+    def __init__(self, s, x, stdev, rf, div, t, nper):
+        """
+        Initialize the tree and the strike price
+        """
+        # Call the tree constructor.
+        super().__init__(s, stdev, rf, div, t, nper)
+        self.x = x
+
+    def header(self):
+        """
+        Return the first line of the printout, with the option parameters
+        """
+        newstr = ""
+        newstr += f"{self.label} Tree "
+        newstr += (
+            f"(s={self.s}, x={self.x}, stdev={self.stdev}, rf={self.rf}, div={self.div}, "
+        )
+        newstr += f"t={self.years} years, nper={self.nper}) \n"
+        return newstr
+
+    @property
+    def option_tree(self):
+        """
+        Return the option value tree, building it on first access.
+        value() does not need it.
+        """
+        if self._option_tree is None:
+            self.build_option_tree()
+        return self._option_tree
+
+    def mark_dirty(self):
+        """
+        Flag the lattice values, the stored trees and the cached option value
+        as stale, so that they are recomputed on the next value() call
+        """
+        super().mark_dirty()
+        self._option_tree = None
+        self._value = None
+        self._levels = None
+
+    def set_x(self, newVal):
+        """
+        Set x to newVal
+        """
+        self.update(x = newVal)
+
+    def set_years(self, newVal):
+        """
+        Set the duration to newVal
+        """
+        self.update(years = newVal)
+
+    def payoff(self, prices):
+        """
+        Return the exercise value of the option for a np.array of
+        underlying prices. This method is overridden in the subclasses.
+        """
+        print(f"Base class {type(self).__name__} has no concrete implementation of .payoff().")
+        return np.zeros_like(prices)
@@ -11,7 +11,8 @@ swapping its rows, and multiplying its rows by a scalar value.
 
 Functions: 
     - print_matrix: Takes two parameters, m which is a 2-dimension list 
-    (the matrix) and label (a string), and creates a nicely-formatted printout
+    (the matrix) and label (a string), and creates a nicely-formatted printout.
+    Large matrices can be truncated to their head/tail rows and first columns.
     
     - zeros: Creates and returns a n*m matrix that contains all zeros
     
@@ -30,38 +31,80 @@ Functions:
     
     - add_row_into: Performs the elementary-row operation to add the 
     src row into the dest row.
+    
+    - TriangularMatrix: An upper-triangular n*n matrix (such as a recombining
+    binomial tree) packed column by column into one contiguous float64 
+    np.array, with (row, col) indexing.
+    
+    - write_table: Writes a (possibly truncated) table row by row to a
+    file-like object.
         
 """
+import sys
+import numpy as np
 
-def print_matrix(m, label=None):
+def print_matrix(m, label=None, file = None, head = None, tail = None, max_cols = None):
     """
     Takes two parameters, m which is a 2-dimension list 
     (the matrix) and label (a string), and 
-    create a nicely-formatted printout.
+    create a nicely-formatted printout. m may also be a TriangularMatrix
+    or a 2-d np.array. The printout is written row by row to file
+    (sys.stdout by default); head, tail and max_cols limit it to the first
+    head and last tail rows and the first max_cols columns.
     """
+    if file is None:
+        file = sys.stdout
     if label == None:
         pass
     else: 
-        print(label, "=")
-    # Check for the first and last rows/columns to prepare for formatting
-    for r in range(len(m)):
-        for c in range(len(m[r])):
-            # If it's the first element, insert two ['s before
-            if r == 0 and c == 0:
-                print(f'[[{m[r][c]:.2f}', end=', ')  
-                
-            # If it's the first element in a separate row, insert 1 [ before
-            elif c == 0:
-                print(f' [{m[r][c]:.2f}', end=', ')   
-            # If it's the last element in the left corner, insert two ]'s after
-            elif r == len(m) - 1 and c == len(m[0]) - 1:
-                print(f'{m[r][c]:.2f}', end=']] ') 
-            elif c == len(m[0]) - 1:
-            # If it's the last element of any other row, insert one ] before
-                print(f'{m[r][c]:.2f}', end='] ') 
-            else:
-                print(f'{m[r][c]:.2f}', end=', ')    
-        print()
+        file.write(f"{label} =\n")
+    numRows = len(m)
+    numCols = len(m[0])
+    cols = range(numCols if max_cols is None else min(numCols, max_cols))
+    
+    for r in displayed_rows(numRows, head, tail):
+        # Mark the skipped rows
+        if r is None:
+            file.write(" ...\n")
+            continue
+        row = m[r]
+        values = ", ".join(f"{row[c]:.2f}" for c in cols)
+        if len(cols) < numCols:
+            values += ", ..."
+        # The first row opens with two ['s, every other row with one
+        prefix = "[[" if r == 0 else " ["
+        # The last row closes with two ]'s, every other row with one
+        suffix = "]] " if r == numRows - 1 else "] "
+        file.write(prefix + values + suffix + "\n")
+
+def displayed_rows(num_rows, head = None, tail = None):
+    """
+    Yield the indices of the rows to display: all of them, or only the
+    first head and the last tail rows, with None in place of the skipped rows
+    """
+    head = 0 if head is None else head
+    tail = 0 if tail is None else tail
+    if (head == 0 and tail == 0) or head + tail >= num_rows:
+        yield from range(num_rows)
+        return
+    yield from range(head)
+    yield None
+    yield from range(num_rows - tail, num_rows)
+
+def write_table(file, num_rows, num_cols, cell, head = None, tail = None, max_cols = None):
+    """
+    Write a table to the file-like object file, one row at a time. cell(row, col)
+    returns the text of one entry. Only the displayed rows (see displayed_rows)
+    and the first max_cols columns are formatted, so the cost is proportional
+    to the output size.
+    """
+    cols = range(num_cols if max_cols is None else min(num_cols, max_cols))
+    more = "  ..." if len(cols) < num_cols else ""
+    for row in displayed_rows(num_rows, head, tail):
+        if row is None:
+            file.write("...\n")
+        else:
+            file.write("".join(cell(row, col) for col in cols) + more + "\n")
 
 def zeros(n, m = None):
     """ 
@@ -150,10 +193,137 @@ def add_row_into(M, src, dest):
     tempRow = M[src]
     for i in range(len(M[dest])):
         M[dest][i] += tempRow[i]
-    
-        
 
-    
 
-    
-    
\ No newline at end of file
+class TriangularRow:
+    """
+    A view of one row of a TriangularMatrix, so that m[row][col] indexing
+    and len(m[row]) work as they do for a 2-D list.
+    """
+    def __init__(self, matrix, row):
+        """
+        Initialize a TriangularRow instance
+        """
+        self.matrix = matrix
+        self.row = row
+
+    def __len__(self):
+        return self.matrix.n
+
+    def __getitem__(self, col):
+        return self.matrix[self.row, col]
+
+    def __setitem__(self, col, value):
+        self.matrix[self.row, col] = value
+
+    def __iter__(self):
+        for col in range(self.matrix.n):
+            yield self.matrix[self.row, col]
+
+
+class TriangularMatrix:
+    """
+    An upper-triangular n*n matrix (entries with row <= col) packed column by
+    column into one contiguous float64 np.array of n*(n+1)/2 entries. Column
+    col of a recombining tree (its col+1 nodes) is one contiguous slice.
+    Entries below the diagonal read as 0.
+    """
+    def __init__(self, n, data = None):
+        """
+        Initialize a TriangularMatrix of size n*n, filled with zeros or
+        with the packed values in data
+        """
+        self.n = n
+        size = n * (n + 1) // 2
+        if data is None:
+            self.data = np.zeros(size)
+        else:
+            self.data = np.asarray(data, dtype = float).reshape(size)
+
+    def __repr__(self):
+        """
+        Create a short representation of the TriangularMatrix instance
+        """
+        return f"TriangularMatrix (n={self.n}, nbytes={self.data.nbytes})"
+
+    def __len__(self):
+        return self.n
+
+    def index(self, row, col):
+        """
+        Return the position of entry (row, col) in the packed array
+        """
+        return col * (col + 1) // 2 + row
+
+    def normalize(self, i, message):
+        """
+        Return the row or column number i, with negative values counted from
+        the end as for a 2-D list. Raise an IndexError if it is out of range.
+        """
+        if i < 0:
+            i += self.n
+        if i < 0 or i >= self.n:
+            raise IndexError(message)
+        return i
+
+    def __getitem__(self, key):
+        """
+        Return entry m[row, col], or a TriangularRow for m[row]. Negative
+        indices count from the end and out-of-range ones raise IndexError,
+        as for a 2-D list.
+        """
+        if isinstance(key, tuple):
+            row = self.normalize(key[0], "Row out of bounds.")
+            col = self.normalize(key[1], "Column out of bounds.")
+            if row > col:
+                return 0.0
+            return self.data[self.index(row, col)]
+        return TriangularRow(self, self.normalize(key, "Row out of bounds."))
+
+    def __setitem__(self, key, value):
+        """
+        Set entry m[row, col]. Only entries on or above the diagonal can be set.
+        """
+        row = self.normalize(key[0], "Row out of bounds.")
+        col = self.normalize(key[1], "Column out of bounds.")
+        if row > col:
+            raise IndexError("Only entries with row <= col are stored.")
+        self.data[self.index(row, col)] = value
+
+    def column(self, col):
+        """
+        Return the stored entries (rows 0 to col) of column col, as a
+        np.array view into the packed data
+        """
+        start = col * (col + 1) // 2
+        return self.data[start:start + col + 1]
+
+    def set_column(self, col, values):
+        """
+        Set the stored entries (rows 0 to col) of column col
+        """
+        self.column(col)[:] = values
+
+    def to_list(self):
+        """
+        Return the full n*n matrix as a 2-D list, with zeros below the diagonal
+        """
+        twoDArray = zeros(self.n)
+        for col in range(self.n):
+            values = self.column(col).tolist()
+            for row in range(col + 1):
+                twoDArray[row][col] = values[row]
+        return twoDArray
+
+    def tobytes(self):
+        """
+        Return the packed data as bytes, for cheap serialization
+        """
+        return self.data.tobytes()
+
+    @classmethod
+    def frombytes(cls, n, buffer):
+        """
+        Create a TriangularMatrix of size n*n from the bytes of tobytes()
+        """
+        return cls(n, np.frombuffer(buffer, dtype = float).copy())
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 16:31:08 2026
+
+@author: Tan Aydemir
+@email: taydemir@bu.edu
+
+This program is a NumPy backend for matrix_util.py. It keeps the same
+function names and signatures, but matrices are contiguous 2-d float64
+np.arrays and the elementary row operations modify them in place. The row
+operations reject lists of lists; convert them with as_matrix first. On top
+of the row operations it provides an LU decomposition with partial
+pivoting, which is used to solve linear systems and invert matrices.
+
+Functions:
+    - print_matrix: Same nicely-formatted printout as matrix_util.py
+
+    - as_matrix: Converts a 2-dimension list (or array) into a float64 np.array
+
+    - zeros: Creates and returns a n*m matrix that contains all zeros
+
+    - identity_matrix: Create and return an n * n identity matrix
+
+    - transpose: Creates and returns the transpose of the provided matrix
+
+    - check_array: Rejects input that is not a np.array
+
+    - swap_rows, mult_row_scalar, add_row_into: The elementary row
+    operations, performed in place on whole rows of a np.array
+
+    - lu_decompose: Factors a square matrix into P*M = L*U
+
+    - lu_solve, solve: Solve M*x = b for one or several right-hand sides
+
+    - inverse: Creates and returns the inverse of the provided matrix
+
+"""
+import numpy as np
+from matrix_util import print_matrix
+
+
+def as_matrix(M):
+    """
+    Return M as a 2-d float64 np.array. A list of lists is copied; an
+    array that already is a float64 matrix is returned as it is, so the
+    row operations below modify it in place.
+    """
+    return np.asarray(M, dtype = float)
+
+
+def zeros(n, m = None):
+    """
+    Create and return a n*m matrix that contains all zeros
+    """
+    # If one parameter is given, create a square matrix
+    if (m == None):
+        m = n
+    return np.zeros((n, m))
+
+
+def identity_matrix(n):
+    """
+    Create and return an n * n identity matrix containing
+    the value of 1 along the diagonal.
+    """
+    return np.eye(n)
+
+
+def transpose(M):
+    """
+    Create and return the transpose of the provided matrix, as a new
+    contiguous np.array
+    """
+    return np.ascontiguousarray(as_matrix(M).T)
+
+
+def check_array(M):
+    """
+    Raise a TypeError unless M is a np.array. The row operations modify M in
+    place, which a converted copy of a list of lists would not do.
+    """
+    if not isinstance(M, np.ndarray):
+        raise TypeError("The row operations need a np.array; "
+                        "convert a 2-dimension list with as_matrix() first.")
+
+
+def swap_rows(M, src, dest):
+    """
+    Perform the elementary row operation that exchanges
+    two rows within the matrix M, in place.
+    """
+    check_array(M)
+    # Print an error if row numbers are not valid.
+    assert (0 <= src < len(M) and 0 <= dest < len(M)), "Row out of bounds"
+    M[[src, dest]] = M[[dest, src]]
+
+
+def mult_row_scalar(M, row, scalar):
+    """
+    Perform the elementary row operation that multiplies
+    all values in the row row by the numerical value scalar, in place.
+    """
+    check_array(M)
+    # Raise exception if the row value are not within range
+    if row < 0 or row > len(M) - 1:
+        raise Exception("Row out of bounds.")
+    M[row] *= scalar
+
+
+def add_row_into(M, src, dest):
+    """
+    Perform the elementary-row operation to add the src row into the
+    dest row, in place.
+    """
+    check_array(M)
+    if src < 0 or src > len(M)-1 or dest < 0 or dest > len(M)-1:
+        raise Exception("Row value is out of bounds. ")
+    M[dest] += M[src]
+
+
+def lu_decompose(M):
+    """
+    Factor the square matrix M with partial pivoting, so that P*M = L*U.
+    Return the factors packed into one n*n np.array (L below the diagonal,
+    with an implied unit diagonal, and U on and above it) and the row
+    permutation as an array of row indices. M itself is not modified.
+    """
+    LU = np.array(M, dtype = float)
+    n = len(LU)
+    assert LU.shape == (n, n), "Matrix must be square."
+    perm = np.arange(n)
+
+    for k in range(n):
+        # Pivot on the largest entry of column k at or below the diagonal
+        pivot = k + int(np.argmax(np.abs(LU[k:, k])))
+        if LU[pivot, k] == 0:
+            raise Exception("Matrix is singular.")
+        if pivot != k:
+            swap_rows(LU, k, pivot)
+            swap_rows(perm, k, pivot)
+
+        # Eliminate column k below the diagonal for all rows at once: store
+        # the multipliers in place and apply a rank-1 update to the rest
+        LU[k + 1:, k] /= LU[k, k]
+        LU[k + 1:, k + 1:] -= np.outer(LU[k + 1:, k], LU[k, k + 1:])
+    return LU, perm
+
+
+def lu_solve(LU, perm, b):
+    """
+    Solve M*x = b given the output of lu_decompose(M). b may be a vector
+    or a matrix with one right-hand side per column.
+    """
+    x = as_matrix(b)[perm]
+    n = len(LU)
+
+    # Forward substitution with the unit lower-triangular L
+    for i in range(1, n):
+        x[i] -= LU[i, :i] @ x[:i]
+    # Back substitution with the upper-triangular U
+    for i in range(n - 1, -1, -1):
+        x[i] -= LU[i, i + 1:] @ x[i + 1:]
+        x[i] /= LU[i, i]
+    return x
+
+
+def solve(M, b):
+    """
+    Solve the linear system M*x = b
+    """
+    LU, perm = lu_decompose(M)
+    return lu_solve(LU, perm, b)
+
+
+def inverse(M):
+    """
+    Create and return the inverse of the provided matrix
+    """
+    LU, perm = lu_decompose(M)
+    return lu_solve(LU, perm, identity_matrix(len(LU)))
+
+
+if __name__ == '__main__':
+    A = as_matrix([[2, 1, 1], [4, -6, 0], [-2, 7, 2]])
+    print_matrix(inverse(A), "inverse(A)")
+    print_matrix(A @ inverse(A), "A * inverse(A)")
+
+    # Check the LU solve and inverse against np.linalg on a large system
+    rng = np.random.default_rng(0)
+    M = rng.standard_normal((1000, 1000))
+    b = rng.standard_normal(1000)
+    assert np.allclose(solve(M, b), np.linalg.solve(M, b))
+    assert np.allclose(inverse(M), np.linalg.inv(M))
+    print("1000 x 1000 solve and inverse match np.linalg")
+
+    # Lists of lists are rejected by the row operations and work once converted
+    L = [[1, 2], [3, 4]]
+    for operation, args in [(swap_rows, (0, 1)), (mult_row_scalar, (0, 3)), (add_row_into, (0, 1))]:
+        try:
+            operation(L, *args)
+            raise AssertionError(f"{operation.__name__} accepted a list")
+        except TypeError:
+            pass
+    assert L == [[1, 2], [3, 4]]
+    M = as_matrix(L)
+    add_row_into(M, 0, 1)
+    mult_row_scalar(M, 0, 3)
+    swap_rows(M, 0, 1)
+    assert M.tolist() == [[4, 6], [3, 6]]
+    assert np.allclose(inverse(L), np.linalg.inv(L)) and np.allclose(solve(L, [1, 1]), [-1, 1])
+    print("List input is rejected by the row operations and converted by as_matrix")
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 15:40:12 2026
+
+@author: Tan Aydemir
+@email: taydemir@bu.edu
+Description:
+    Inheriting from the TrinomialTree class, the TrinomialOption class prices
+    European and American options on a trinomial lattice, with the same API
+    as BinomialOption (value, setters, update and repr). Its subclasses are
+    TrinomialEuroCallOption, TrinomialEuroPutOption, TrinomialAmericanCallOption
+    and TrinomialAmericanPutOption. Values come from a vectorized backward
+    induction that keeps one time level of the tree at a time.
+"""
+
+import numpy as np
+from binomial_tree import BinomialTree
+from lattice_option import LatticeOption
+from trinomial_tree import TrinomialTree
+
+class TrinomialOption(LatticeOption, TrinomialTree):
+    """
+    Create a class named TrinomialOption. This is a sub-class of
+    TrinomialTree, with the option layer shared with BinomialOption
+    coming from LatticeOption.
+    """
+    # Name used by __repr__
+    label = "Trinomial Option"
+
+    def tree_cells(self, num_cols):
+        """
+        Return the number of rows that hold a node in the first num_cols
+        levels of the option tree and a function giving the text of the
+        node (row, col). If the tree has not been built, only those levels
+        are recorded.
+        """
+        if self._option_tree is not None:
+            tree = self._option_tree
+            levels = [[tree[row][col] for row in range(2 * col + 1)] for col in range(num_cols)]
+        else:
+            levels = []
+            self.rollback(keep = levels, num_kept = num_cols)
+            levels.reverse()
+
+        def cell(row, col):
+            # Only display the nodes that exist at each level
+            if row > 2 * col:
+                return "         "
+            return f"{levels[col][row]:8.2f} "
+        return 2 * num_cols - 1, cell
+
+    def rollback(self, keep = None, num_kept = None):
+        """
+        Run backward induction on a single 1-D np.array holding one time
+        level of the tree at a time. If keep is a list, the option values of
+        every level (or of the first num_kept levels) are appended to it,
+        from maturity back to Time 0. Return the option values of levels 0 and 1.
+        """
+        if num_kept is None:
+            num_kept = self.nper + 1
+        h, u, pUp, pMid, pDown, discount = self.lattice_params()
+
+        # Underlying prices at maturity: row k is s * u ** (nper - k)
+        rows = np.arange(2 * self.nper + 1)
+        prices = self.s * np.exp((self.nper - rows) * np.log(u))
+        values = self.payoff(prices)
+        if keep is not None and self.nper < num_kept:
+            keep.append(values)
+
+        # Roll the values back one level at a time
+        levelOne = values
+        for col in range(self.nper - 1, -1, -1):
+            values = discount * (pUp * values[:-2] + pMid * values[1:-1] + pDown * values[2:])
+            if self.early_exercise:
+                # Node prices one level earlier are the inner nodes of this level
+                prices = prices[1:-1]
+                values = np.maximum(values, self.payoff(prices))
+            if keep is not None and col < num_kept:
+                keep.append(values)
+            if col == 1:
+                levelOne = values
+        return values, levelOne
+
+    def value(self):
+        """
+        Return the value of the option at Time 0. The value is cached until
+        a parameter changes.
+        """
+        if self._value is None:
+            levelZero, levelOne = self.rollback()
+            self._value = float(levelZero[0])
+            self._levels = levelOne
+        return self._value
+
+    def build_option_tree(self):
+        """
+        Calculate the option value at each node of the Option tree.
+        Save it as a data attribute 'option_tree.'
+        """
+        levels = []
+        self.rollback(keep = levels)
+
+        # levels runs from maturity back to Time 0; column col has 2*col+1 nodes
+        newLst = BinomialTree.zeros(2 * self.nper + 1, self.nper + 1)
+        for col, values in enumerate(reversed(levels)):
+            for row in range(2 * col + 1):
+                newLst[row][col] = float(values[row])
+        self._option_tree = newLst
+        return self._option_tree
+
+    def delta(self):
+        """
+        Return the delta of the option, from the up and down nodes at level 1
+        """
+        h, u, pUp, pMid, pDown, discount = self.lattice_params()
+        self.value()
+        levelOne = self._levels
+        return float((levelOne[0] - levelOne[2]) / (self.s * u - self.s / u))
+
+    def gamma(self):
+        """
+        Return the gamma of the option, from the three nodes at level 1
+        """
+        h, u, pUp, pMid, pDown, discount = self.lattice_params()
+        self.value()
+        levelOne = self._levels
+        deltaUp = (levelOne[0] - levelOne[1]) / (self.s * u - self.s)
+        deltaDown = (levelOne[1] - levelOne[2]) / (self.s - self.s / u)
+        return float((deltaUp - deltaDown) / ((self.s * u - self.s / u) / 2))
+
+    def theta(self):
+        """
+        Return the theta of the option (per year). The middle node at level 1
+        has the same price as the root, so no price correction is needed.
+        """
+        h, u, pUp, pMid, pDown, discount = self.lattice_params()
+        self.value()
+        return float((self._levels[1] - self._value) / h)
+
+
+class TrinomialEuroCallOption(TrinomialOption):
+    """
+    Create a class named TrinomialEuroCallOption. This is
+    a sub-class of TrinomialOption above.
+    """
+    label = "Trinomial European Call Option"
+
+    def payoff(self, prices):
+        """
+        Return the exercise value of the call for a np.array of underlying prices
+        """
+        return np.maximum(prices - self.x, 0)
+
+
+class TrinomialEuroPutOption(TrinomialOption):
+    """
+    Create a class named TrinomialEuroPutOption. This is
+    a sub-class of TrinomialOption above.
+    """
+    label = "Trinomial European Put Option"
+
+    def payoff(self, prices):
+        """
+        Return the exercise value of the put for a np.array of underlying prices
+        """
+        return np.maximum(self.x - prices, 0)
+
+
+class TrinomialAmericanCallOption(TrinomialEuroCallOption):
+    """
+    Create a class named TrinomialAmericanCallOption. This is a call that
+    may be exercised at any node of the tree.
+    """
+    early_exercise = True
+    label = "Trinomial American Call Option"
+
+
+class TrinomialAmericanPutOption(TrinomialEuroPutOption):
+    """
+    Create a class named TrinomialAmericanPutOption. This is a put that
+    may be exercised at any node of the tree.
+    """
+    early_exercise = True
+    label = "Trinomial American Put Option"
+
+
+if __name__ == '__main__':
+    put = TrinomialAmericanPutOption(100, 105, 0.3, 0.05, 0.02, 1, 3)
+    print(put)
+    print("Option value:", put.value())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 15:02:44 2026
+
+@author: Tan Aydemir
+@email: taydemir@bu.edu
+Description:
+    This program implements a recombinant trinomial tree for asset price
+    movements. It follows the BinomialTree API (setters, update, lazy tree
+    and repr), but every node moves up, stays in the middle or moves down,
+    so level i of the tree has 2i+1 nodes. The tree is stored as a
+    (2 * nper + 1) x (nper + 1) 2-d list: row k of column i holds the node
+    with k more down moves than the top node.
+
+"""
+import math
+from binomial_tree import BinomialTree
+
+class TrinomialTree(BinomialTree):
+    """
+    Develops a recombinant trinomial tree suitable for any underlying asset
+    """
+
+    def header(self):
+        """
+        Return the first line of the printout, with the tree parameters
+        """
+        newstr = ""
+        newstr += "TrinomialTree "
+        newstr += (
+            f"(s={self.s}, stdev={self.stdev}, rf={self.rf}, div={self.div}, "
+        )
+        newstr += f"t={self.years} years, nper={self.nper}) \n"
+        return newstr
+
+    def tree_cells(self, num_cols):
+        """
+        Return the number of rows that hold a node in the first num_cols
+        levels of the tree and a function giving the text of the node
+        (row, col)
+        """
+        h, u, pUp, pMid, pDown, discount = self.lattice_params()
+
+        def cell(row, col):
+            # Only display the nodes that exist at this level
+            if row > 2 * col:
+                return "         "
+            return f"{self.s * u ** (col - row):8.2f} "
+        return 2 * num_cols - 1, cell
+
+    def compute_lattice_params(self):
+        """
+        Calculate h, the up factor u (the down factor is 1/u), the
+        risk-neutral probabilities of an up, middle and down move and the
+        one-period discount factor from the current parameters
+        """
+        #Calculate h
+        h = self.years / self.nper
+        #Calculate u
+        u = math.exp(self.stdev * math.sqrt(2 * h))
+
+        # Boyle's probabilities, built from a half-period binomial step
+        growth = math.exp((self.rf - self.div) * h / 2)
+        halfUp = math.exp(self.stdev * math.sqrt(h / 2))
+        halfDown = 1 / halfUp
+        pUp = ((growth - halfDown) / (halfUp - halfDown)) ** 2
+        pDown = ((halfUp - growth) / (halfUp - halfDown)) ** 2
+        pMid = 1 - pUp - pDown
+        # With low volatility relative to the drift, the middle move gets a
+        # negative probability and the tree is no longer arbitrage free
+        assert min(pUp, pMid, pDown) >= 0 and max(pUp, pMid, pDown) <= 1, \
+            "Trinomial probabilities must be between 0 and 1; increase nper or stdev. "
+        discount = math.exp(-self.rf * h)
+        return h, u, pUp, pMid, pDown, discount
+
+    def build_tree(self):
+        """
+        Build a trinomial tree (as a 2-d list), which will simulate the
+        price movements of the s asset
+        """
+        h, u, pUp, pMid, pDown, discount = self.lattice_params()
+        # Create a zero-matrix to store the newly computated values.
+        zerosMatrix = BinomialTree.zeros(2 * self.nper + 1, self.nper + 1)
+
+        # The node in row k of column col is s * u ** (col - k)
+        for col in range(self.nper + 1):
+            for row in range(2 * col + 1):
+                zerosMatrix[row][col] = self.s * u ** (col - row)
+
+        #Assign the 2-d list to the self.tree variable.
+        self._tree = zerosMatrix
+        return self._tree
+
+
+if __name__ == "__main__":
+    t = TrinomialTree(100, 0.3, 0.05, 0.02, 1, 3)
+    print(t)
+    t.update(s = 50, nper = 2)
+    print(t)
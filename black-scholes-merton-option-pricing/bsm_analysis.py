@@ -6,12 +6,18 @@ Created on Mon Mar 18 20:24:05 2024
 @author: Tan Aydemir
 @email: taydemir@bu.edu
 
-This program calculates option values and implied volatility for European call
-and put options using the BSM model.
+This program calculates option values, scenario risk grids and implied
+volatility for European call and put options using the BSM model. Implied
+volatilities start from the Corrado-Miller approximation and are refined by
+vega-based Newton steps, with a bracketed Brent (or, for whole chains,
+bisection) fallback.
 
 """
 
 from a8task1 import *
+import numpy as np
+import pandas as pd
+from scipy.optimize import brentq
 
 def generate_option_value_table(s, x, t, sigma, rf, div): 
     """
@@ -35,60 +41,216 @@ def generate_option_value_table(s, x, t, sigma, rf, div):
     
     print("      price      call value  put value   call delta  put delta")
     
-    # Iterate through a range of prices from -10 to + 10 of the actual price. 
-    for i in range(lowerLimit, upperLimit + 1):
-        
-        # First, set the price to i
-        callObject.s = i
-        putObject.s = i
-        
-        # Call the value() function to get the value of Call & Put Options
-        callValue = callObject.value()
-        putValue = putObject.value()
-        
-        # Call the delta() function to get the delta of Call & Put Options
-        callDelta = callObject.delta()
-        putDelta = putObject.delta()
-        
-        # Print the values in a formatted way.  
-        print(f"${callObject.s:12.2f}{callValue:12.4f}{putValue:12.4f}{callDelta:12.4f}{putDelta:12.4f}")
+    # Price the range of prices from -10 to + 10 of the actual price in one pass
+    prices = np.arange(lowerLimit, upperLimit + 1)
+    callValues, callDeltas = bsm_value_and_delta(prices, x, t, sigma, rf, div, True)
+    putValues, putDeltas = bsm_value_and_delta(prices, x, t, sigma, rf, div, False)
+    
+    # Print the values in a formatted way.  
+    for i in range(len(prices)):
+        print(f"${prices[i]:12.2f}{callValues[i]:12.4f}{putValues[i]:12.4f}{callDeltas[i]:12.4f}{putDeltas[i]:12.4f}")
+
+
+def scenario_risk_grid(s, x, t, sigma, rf, div, call = True, spot_shocks = (0,), vol_shocks = (0,),
+                       time_shocks = (0,), rate_shocks = (0,), as_frame = True):
+    """
+    Evaluate the value and Greeks of one European option over the full
+    Cartesian grid of spot x vol x time x rate shocks in one vectorized pass.
+    spot_shocks are relative moves of s (0.05 is +5%), vol_shocks and
+    rate_shocks are added to sigma and rf, and time_shocks are years elapsed
+    (the remaining time is floored just above 0). Return a tidy pd.DataFrame
+    with one row per scenario, or, if as_frame is False, a dict of np.arrays
+    shaped (spot, vol, time, rate).
+    """
+    axes = [np.asarray(a, dtype = float) for a in (spot_shocks, vol_shocks, time_shocks, rate_shocks)]
+    spot, vol, elapsed, rate = np.meshgrid(*axes, indexing = 'ij')
+
+    scenarios = {
+        's': s * (1 + spot),
+        'sigma': sigma + vol,
+        't': np.maximum(t - elapsed, 1e-10),
+        'rf': rf + rate,
+    }
+    greeks = bsm_greeks(scenarios['s'], x, scenarios['t'], scenarios['sigma'], scenarios['rf'],
+                        div, call)
+    # Profit and loss of each scenario against the unshocked value
+    base = bsm_greeks(s, x, t, sigma, rf, div, call)['value']
+    greeks['pnl'] = greeks['value'] - base
+
+    grid = {'spot_shock': spot, 'vol_shock': vol, 'time_shock': elapsed, 'rate_shock': rate}
+    grid.update(scenarios)
+    grid.update(greeks)
+    if not as_frame:
+        return grid
+    return pd.DataFrame({name: np.broadcast_to(values, spot.shape).ravel()
+                         for name, values in grid.items()})
 
 
 def calculate_implied_volatility(option, value):
     """
-    Compute the implied volatility of an option. 
+    Compute the implied volatility of an option. The option itself is
+    not modified.
     """
-    accuracy = 0.00001
-    dif = value
-
-    upperBound = 1
-    lowerBound = 0
-    testRate = (upperBound + lowerBound) / 2
-
-    # Change the test_rate consistently until the accuracy is achieved
-    while True:
-        option.sigma = testRate # Set the stdev of option to testRate
-        optionValue = option.value() # Calculate the optionValue using the new test rate
-        dif = value - optionValue
-        
-        # If the difference is better than our provided accuracy index, exit the loop. 
-        if abs(dif) < accuracy:
-            break
-        
-        # If the difference is less than 0 assign upperBound to testRate
-        if dif < 0:
-            upperBound = testRate
-        
-        #If the difference is greater than 0 assign lowerBound to testRate
+    return implied_volatility(value, option.s, option.x, option.t, option.rf, option.div,
+                              option.call)
+
+
+def price_bounds(s, x, t, rf, div, call = True):
+    """
+    Return the no-arbitrage (lower, upper) bounds of a European option
+    price. Prices outside them have no implied volatility.
+    """
+    sDiscounted = s * np.exp(-div * t)
+    xDiscounted = x * np.exp(-rf * t)
+    sign = np.where(call, 1.0, -1.0)
+    lower = np.maximum(sign * (sDiscounted - xDiscounted), 0)
+    upper = np.where(call, sDiscounted, xDiscounted)
+    return lower, upper
+
+
+def initial_volatility(price, s, x, t, rf, div, call = True):
+    """
+    Compute the Corrado-Miller approximation of the implied volatility,
+    used as the starting point of the Newton iterations. Puts are
+    converted to calls by put-call parity.
+    """
+    sDiscounted = s * np.exp(-div * t)
+    xDiscounted = x * np.exp(-rf * t)
+    callPrice = np.where(call, price, price + sDiscounted - xDiscounted)
+
+    half = callPrice - (sDiscounted - xDiscounted) / 2
+    # The square root term can be negative far from the money; drop it there
+    root = np.sqrt(np.maximum(half ** 2 - (sDiscounted - xDiscounted) ** 2 / np.pi, 0))
+    guess = np.sqrt(2 * np.pi / t) / (sDiscounted + xDiscounted) * (half + root)
+    return np.clip(guess, 0.01, 5)
+
+
+def implied_volatility(price, s, x, t, rf, div, call = True, tol = 1e-10, max_iter = 20):
+    """
+    Compute the implied volatility of one European option from its price.
+    Start from the Corrado-Miller guess, take vega-based Newton steps while
+    they stay inside the bracket known to hold the root, and fall back to
+    Brent's method on that bracket otherwise. Return NaN for prices
+    outside the no-arbitrage bounds.
+    """
+    lower, upper = price_bounds(s, x, t, rf, div, call)
+    if not lower < price < upper:
+        return float('nan')
+
+    option = (BSMEuroCallOption if call else BSMEuroPutOption)(s, x, t, 0, rf, div)
+    # The trial volatilities are throwaway inputs: keep them out of any
+    # BSMCache attached to the option classes
+    option.cache = None
+    sigma = float(initial_volatility(price, s, x, t, rf, div, call))
+    # The value increases with sigma, so the root stays between low and high
+    low, high = 0.0, float('inf')
+
+    for i in range(max_iter):
+        option.sigma = sigma
+        greeks = option.compute_greeks()
+        dif = greeks['value'] - price
+        if abs(dif) < tol:
+            return sigma
+        if dif > 0:
+            high = sigma
         else:
-            lowerBound = testRate
-        testRate = (upperBound + lowerBound) / 2
-    
-    # Return test rate
-    return testRate
+            low = sigma
+        newSigma = sigma - dif / greeks['vega'] if greeks['vega'] > 0 else -1
+        # Leave Newton once a step jumps out of the bracket
+        if not low < newSigma < high:
+            break
+        sigma = newSigma
+
+    # Brent fallback: first find a volatility that overprices the option
+    if high == float('inf'):
+        high = max(2 * sigma, 1.0)
+        option.sigma = high
+        while option.value() < price:
+            low, high = high, 2 * high
+            option.sigma = high
+
+    def dif(vol):
+        option.sigma = vol
+        return option.value() - price
+    return brentq(dif, max(low, 1e-12), high, xtol = 1e-14, rtol = 4 * np.finfo(float).eps)
+
+
+def implied_volatility_chain(price, s, x, t, rf, div, call = True, tol = 1e-10, max_iter = 100):
+    """
+    Compute the implied volatilities of a whole option chain in one call.
+    The inputs are broadcast as in bsm_value_and_delta. Every contract takes
+    safeguarded Newton steps from the Corrado-Miller guess, all at once;
+    a contract whose Newton step leaves its bracket bisects instead. Return
+    a np.array, NaN where the price is outside the no-arbitrage bounds.
+    """
+    price, s, x, t, rf, div, call = np.broadcast_arrays(
+        *[np.asarray(a, dtype = float) for a in (price, s, x, t, rf, div)], np.asarray(call))
+    lower, upper = price_bounds(s, x, t, rf, div, call)
+    valid = (price > lower) & (price < upper)
+
+    sigma = np.where(valid, initial_volatility(price, s, x, t, rf, div, call), np.nan)
+    low = np.zeros(sigma.shape)
+    high = np.full(sigma.shape, np.inf)
+    active = np.flatnonzero(valid)
+
+    for i in range(max_iter):
+        if len(active) == 0:
+            break
+        args = [a.flat[active] for a in (s, x, t, rf, div, call)]
+        sig = sigma.flat[active]
+        greeks = bsm_greeks(args[0], args[1], args[2], sig, args[3], args[4], args[5])
+        dif = greeks['value'] - price.flat[active]
+
+        # Tighten the brackets around the roots
+        over = dif > 0
+        high.flat[active[over]] = sig[over]
+        low.flat[active[~over]] = sig[~over]
+        lo, hi = low.flat[active], high.flat[active]
+
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            newton = sig - dif / greeks['vega']
+        # Bisect (or double, while there is no upper bracket) where Newton leaves the bracket
+        fallback = np.where(np.isinf(hi), 2 * sig, (lo + hi) / 2)
+        inside = (newton > lo) & (newton < hi)
+        sigma.flat[active] = np.where(inside, newton, fallback)
+
+        done = (np.abs(dif) < tol) | (hi - lo < 1e-15)
+        sigma.flat[active[done]] = sig[done]
+        active = active[~done]
+    return sigma
+
 
-        
 if __name__ == '__main__':
     call = BSMEuroCallOption(100, 100, 0.5, 0.25, 0.04, 0.02)
     put = BSMEuroPutOption(100, 100, 0.5, 0.25, 0.04, 0.02)
-    generate_option_value_table(90, 95, 1.25, 0.3, 0.05, 0.02)
\ No newline at end of file
+    generate_option_value_table(90, 95, 1.25, 0.3, 0.05, 0.02)
+    
+    # A 21 x 11 x 5 x 3 risk matrix for one call
+    grid = scenario_risk_grid(100, 100, 0.5, 0.25, 0.04, 0.02, True,
+                              spot_shocks = np.linspace(-0.2, 0.2, 21),
+                              vol_shocks = np.linspace(-0.1, 0.1, 11),
+                              time_shocks = [0, 1 / 252, 5 / 252, 21 / 252, 0.25],
+                              rate_shocks = [-0.01, 0, 0.01])
+    print(grid.head())
+    row = grid.iloc[1234]
+    option = BSMEuroCallOption(row['s'], 100, row['t'], row['sigma'], row['rf'], 0.02)
+    assert abs(option.value() - row['value']) < 1e-10
+
+    # The solvers must recover the volatility used to price a chain
+    rng = np.random.default_rng(0)
+    n = 100000
+    strikes = rng.uniform(60, 160, n)
+    years = rng.uniform(0.02, 3, n)
+    vols = rng.uniform(0.05, 2.5, n)
+    isCall = rng.random(n) < 0.5
+    prices, deltas = bsm_value_and_delta(100, strikes, years, vols, 0.04, 0.02, isCall)
+    solved = implied_volatility_chain(prices, 100, strikes, years, 0.04, 0.02, isCall)
+    # Skip contracts whose price is too close to its bounds to identify sigma
+    vegas = bsm_greeks(100, strikes, years, vols, 0.04, 0.02, isCall)['vega']
+    usable = vegas > 1e-4
+    print("Chain: max abs vol error", np.nanmax(np.abs(solved - vols)[usable]))
+    for i in range(0, n, 5000):
+        if usable[i]:
+            vol = implied_volatility(prices[i], 100, strikes[i], years[i], 0.04, 0.02, isCall[i])
+            assert abs(vol - vols[i]) < 1e-6, (i, vol, vols[i])
+    print(calculate_implied_volatility(call, call.value()), call.sigma)
@@ -7,17 +7,45 @@ Created on Mon Mar 18 18:22:08 2024
 @email: taydemir@bu.edu
 
 This program has classes for European call and put options
-valuation using the Black-Scholes-Merton model.
+valuation using the Black-Scholes-Merton model. The functions 
+bsm_value_and_delta and price_option_chain price whole option chains 
+at once on np.arrays (or pd.DataFrame columns).
 
 """
 import math
+from collections import OrderedDict
+import numpy as np
 from scipy.stats import norm
+from scipy.special import ndtr
+
+# Greeks returned by BSMOption.greeks() and bsm_greeks()
+GREEKS = ('value', 'delta', 'gamma', 'vega', 'theta', 'rho')
+SQRT2 = math.sqrt(2)
+SQRT2PI = math.sqrt(2 * math.pi)
+
+
+def norm_cdf(z):
+    """
+    Standard normal cumulative distribution function. Python floats use
+    math.erfc, which is accurate in both tails and avoids the per-call
+    overhead of scipy.stats.norm.cdf; np.arrays use the scipy.special.ndtr
+    ufunc.
+    """
+    if isinstance(z, (float, int)):
+        return 0.5 * math.erfc(-z / SQRT2)
+    return ndtr(z)
+
 
 class BSMOption:
     """
     Base Class for Black-Scholes-Merton Option. It encapsulates the data required 
     to do Black-Scholes option pricing formulae. 
     """
+    # True for calls and False for puts; set by the subclasses
+    call = None
+    # Optional BSMCache that memoizes value() and greeks()
+    cache = None
+
     def __init__(self, s, x, t, sigma, rf, div):
         """
         First initialize the BSMOption instance
@@ -60,14 +88,14 @@ class BSMOption:
         """
         Find cumulative probability density of the factor d1
         """
-        nd1 = norm.cdf(self.d1())
+        nd1 = norm_cdf(self.d1())
         return nd1
         
     def nd2(self):
         """
         Find cumulative probability density of the factor d2
         """
-        nd2 = norm.cdf(self.d2())
+        nd2 = norm_cdf(self.d2())
         return nd2
     
     def value(self):
@@ -83,6 +111,47 @@ class BSMOption:
         """
         print("Cannot calculate delta for base class BSMOption.")
         return 0
+
+    def greeks(self):
+        """
+        Return the value, delta, gamma, vega, theta and rho of the option
+        in a dict, from the cache if one is attached
+        """
+        if self.cache is not None:
+            return self.cache.greeks(self)
+        return self.compute_greeks()
+
+    def compute_greeks(self):
+        """
+        Compute the value, delta, gamma, vega, theta and rho of the option
+        together, from a single evaluation of d1, d2, the normal pdf and
+        the cdfs. Return them in a dict.
+        """
+        if self.call is None:
+            print("Cannot calculate greeks for base class BSMOption.")
+            return dict.fromkeys(GREEKS, 0)
+        # +1 for calls, -1 for puts, as in bsm_greeks
+        sign = 1 if self.call else -1
+        rootT = math.sqrt(self.t)
+        sigmaRootT = self.sigma * rootT
+        d1 = self.d1()
+        d2 = d1 - sigmaRootT
+
+        divDiscount = math.exp(-self.div * self.t)
+        sDiscounted = self.s * divDiscount
+        xDiscounted = self.x * math.exp(-self.rf * self.t)
+        sPdf = sDiscounted * math.exp(-d1 * d1 / 2) / SQRT2PI
+        nd1 = norm_cdf(sign * d1)
+        nd2 = norm_cdf(sign * d2)
+        return {
+            'value': sign * (sDiscounted * nd1 - xDiscounted * nd2),
+            'delta': sign * divDiscount * nd1,
+            'gamma': sPdf / (self.s * self.s * sigmaRootT),
+            'vega': sPdf * rootT,
+            'theta': (-sPdf * self.sigma / (2 * rootT)
+                      + sign * (self.div * sDiscounted * nd1 - self.rf * xDiscounted * nd2)),
+            'rho': sign * self.t * xDiscounted * nd2,
+        }
     
     
     
@@ -91,6 +160,8 @@ class BSMEuroCallOption(BSMOption):
     A Child class of the BSMOption class. This class is representing
     a European Call option. 
     """
+    call = True
+
     def __init__(self, s, x, t, sigma, rf, div):
         """ 
         Initialize BSMEuroCallOption instance.
@@ -111,6 +182,9 @@ class BSMEuroCallOption(BSMOption):
         """
         Compute the value of the BSMEuroCallOption instance
         """
+        # Use the memoized Greeks when a cache is attached
+        if self.cache is not None:
+            return self.cache.value(self)
         firstPart = self.s * (math.e ** (-1 * self.div * self.t)) * self.nd1()
         secondPart = self.x * (math.e ** (-1 * self.rf * self.t)) * self.nd2()
         return (firstPart - secondPart)
@@ -128,6 +202,8 @@ class BSMEuroPutOption(BSMOption):
     A Child class of the BSMOption class. This class is representing
     a European Put option. 
     """
+    call = False
+
     def __init__(self, s, x, t, sigma, rf, div):
         """ 
         Initialize BSMEuroPutOption instance.
@@ -148,6 +224,9 @@ class BSMEuroPutOption(BSMOption):
         """
         Compute the value of the BSMEuroPutOption instance
         """
+        # Use the memoized Greeks when a cache is attached
+        if self.cache is not None:
+            return self.cache.value(self)
         firstPart = self.x * (math.e ** (-self.rf * self.t)) * (1 - self.nd2())
         secondPart = self.s * (math.e ** (-self.div * self.t)) * (1 - self.nd1())
 
@@ -160,6 +239,166 @@ class BSMEuroPutOption(BSMOption):
         deltaVal = (-math.e ** (-self.div * self.t)) * (1 - self.nd1())
         return deltaVal
 
+class BSMCache:
+    """
+    A least-recently-used cache of BSM Greeks, keyed on the option type and
+    its (s, x, t, sigma, rf, div) inputs. Attach it to one option
+    (option.cache = BSMCache()) or to all options (BSMOption.cache = ...)
+    and value() and greeks() become dictionary lookups while the inputs
+    are unchanged. If quantum is given (a float, or a dict with one per
+    input name), inputs are rounded to multiples of it and the option is
+    priced at the rounded inputs; otherwise the cache is exact.
+    """
+    # Inputs that make up the cache key, after the option type
+    inputs = ('s', 'x', 't', 'sigma', 'rf', 'div')
+
+    def __init__(self, maxsize = 10000, quantum = None):
+        """
+        Initialize an empty BSMCache holding at most maxsize entries
+        """
+        self.maxsize = maxsize
+        self.quantum = quantum
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        """
+        Create a nicely-formatted representation of the BSMCache instance.
+        """
+        return (f"BSMCache (size = {len(self.entries)}/{self.maxsize}, "
+                f"hits = {self.hits}, misses = {self.misses})")
+
+    def __len__(self):
+        return len(self.entries)
+
+    def key(self, option):
+        """
+        Return the cache key of the option: its type and its inputs, rounded
+        to the quantum if there is one
+        """
+        if self.quantum is None:
+            return (type(option), option.s, option.x, option.t, option.sigma, option.rf, option.div)
+        values = [getattr(option, name) for name in self.inputs]
+        for i, name in enumerate(self.inputs):
+            q = self.quantum.get(name) if isinstance(self.quantum, dict) else self.quantum
+            if q:
+                # Round again to drop the floating-point noise of the product
+                values[i] = round(round(values[i] / q) * q, 12)
+        return (type(option),) + tuple(values)
+
+    def lookup(self, option):
+        """
+        Return the stored Greeks of the option or, on a miss, compute and
+        store them
+        """
+        key = self.key(option)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        # Price at the (possibly rounded) inputs of the key
+        entry = key[0](*key[1:]).compute_greeks()
+        self.entries[key] = entry
+        # Evict the least recently used entry
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last = False)
+        return entry
+
+    def greeks(self, option):
+        """
+        Return the Greeks of the option (a new dict, as BSMOption.greeks)
+        """
+        return dict(self.lookup(option))
+
+    def value(self, option):
+        """
+        Return the value of the option
+        """
+        return self.lookup(option)['value']
+
+    def clear(self):
+        """
+        Remove all the entries and reset the hit and miss counters
+        """
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def bsm_terms(s, x, t, sigma, rf, div, call = True):
+    """
+    Return the intermediates shared by bsm_value_and_delta and bsm_greeks,
+    broadcast np.arrays: the sign (+1 for calls, -1 for puts, so one formula
+    prices both), d1, e^(-div * t), S * e^(-div * t), X * e^(-rf * t),
+    N(sign * d1) and N(sign * d2).
+    """
+    s, x, t, sigma, rf, div = [np.asarray(a, dtype = float) for a in (s, x, t, sigma, rf, div)]
+    sign = np.where(call, 1.0, -1.0)
+
+    sigmaRootT = sigma * np.sqrt(t)
+    d1 = (np.log(s / x) + t * (rf - div + sigma ** 2 / 2)) / sigmaRootT
+    d2 = d1 - sigmaRootT
+    divDiscount = np.exp(-div * t)
+    return (sign, d1, divDiscount, s * divDiscount, x * np.exp(-rf * t),
+            ndtr(sign * d1), ndtr(sign * d2))
+
+
+def bsm_value_and_delta(s, x, t, sigma, rf, div, call = True):
+    """
+    Compute the values and deltas of many European options in one call.
+    s, x, t, sigma, rf, div and call (True for a call, False for a put) may
+    be scalars, np.arrays or pd.Series; they are broadcast against each
+    other. Return a tuple of np.arrays (value, delta).
+    """
+    sign, d1, divDiscount, sDiscounted, xDiscounted, nd1, nd2 = bsm_terms(s, x, t, sigma,
+                                                                          rf, div, call)
+    return sign * (sDiscounted * nd1 - xDiscounted * nd2), sign * divDiscount * nd1
+
+
+def bsm_greeks(s, x, t, sigma, rf, div, call = True):
+    """
+    Compute the values and Greeks of many European options in one call,
+    with the same broadcasting inputs as bsm_value_and_delta. The
+    intermediates from bsm_terms and the normal pdf are computed once and
+    shared by all the Greeks. Return a dict of np.arrays with the value,
+    delta, gamma, vega (per 1.00 of sigma), theta (per year) and rho
+    (per 1.00 of rf).
+    """
+    s, x, t, sigma, rf, div = [np.asarray(a, dtype = float) for a in (s, x, t, sigma, rf, div)]
+    sign, d1, divDiscount, sDiscounted, xDiscounted, nd1, nd2 = bsm_terms(s, x, t, sigma,
+                                                                          rf, div, call)
+    rootT = np.sqrt(t)
+    pdf = np.exp(-d1 ** 2 / 2) / SQRT2PI
+
+    # S * e^(-div * t) * pdf(d1), the common factor of gamma, vega and theta
+    sPdf = sDiscounted * pdf
+    return {
+        'value': sign * (sDiscounted * nd1 - xDiscounted * nd2),
+        'delta': sign * divDiscount * nd1,
+        'gamma': sPdf / (s * s * sigma * rootT),
+        'vega': sPdf * rootT,
+        'theta': (-sPdf * sigma / (2 * rootT)
+                  + sign * (div * sDiscounted * nd1 - rf * xDiscounted * nd2)),
+        'rho': sign * t * xDiscounted * nd2,
+    }
+
+
+def price_option_chain(chain):
+    """
+    Price an option chain held in a pd.DataFrame with columns s, x, t,
+    sigma, rf, div and call (True for calls, False for puts; all calls if
+    the column is missing). Return a copy of chain with value and delta columns.
+    """
+    call = chain['call'].to_numpy(dtype = bool) if 'call' in chain else True
+    value, delta = bsm_value_and_delta(chain['s'], chain['x'], chain['t'], chain['sigma'],
+                                       chain['rf'], chain['div'], call)
+    return chain.assign(value = value, delta = delta)
+
+
 if __name__ == '__main__':
     call = BSMEuroCallOption(100, 100, 0.5, 0.25, 0.04, 0.02)
     print(call.delta())
@@ -169,4 +408,49 @@ if __name__ == '__main__':
     print(call.delta())
     put.sigma = 0.5
     print(put.delta())
-    
+
+    # The vectorized prices must match the option classes
+    rng = np.random.default_rng(0)
+    n = 100000
+    s, x = 100.0, rng.uniform(50, 150, n)
+    t, sigma = rng.uniform(0.05, 2, n), rng.uniform(0.05, 0.8, n)
+    isCall = rng.random(n) < 0.5
+    value, delta = bsm_value_and_delta(s, x, t, sigma, 0.04, 0.02, isCall)
+    for i in range(0, n, 10000):
+        cls = BSMEuroCallOption if isCall[i] else BSMEuroPutOption
+        option = cls(s, x[i], t[i], sigma[i], 0.04, 0.02)
+        assert abs(option.value() - value[i]) < 1e-9 and abs(option.delta() - delta[i]) < 1e-12
+    print(f"Priced {n} contracts in one call")
+
+    # The Greeks must match finite differences of the option value
+    for cls in [BSMEuroCallOption, BSMEuroPutOption]:
+        option = cls(100, 95, 0.5, 0.25, 0.04, 0.02)
+        greeks = option.greeks()
+        bump = 1e-4
+        for name, attr in [('delta', 's'), ('vega', 'sigma'), ('rho', 'rf')]:
+            base = getattr(option, attr)
+            setattr(option, attr, base + bump)
+            up = option.value()
+            setattr(option, attr, base - bump)
+            down = option.value()
+            setattr(option, attr, base)
+            assert abs((up - down) / (2 * bump) - greeks[name]) < 1e-5, (cls.__name__, name)
+        print(cls.__name__, {name: round(v, 6) for name, v in greeks.items()})
+
+    # The fast normal cdf must match scipy in the body and both tails
+    z = np.linspace(-37, 8, 100001)
+    exact = norm.cdf(z)
+    scalar = np.array([norm_cdf(float(v)) for v in z])
+    assert np.all(np.abs(scalar - exact) <= 1e-12 * exact)
+    assert np.array_equal(norm_cdf(z), exact)
+    vectorized = bsm_greeks(100, 95, 0.5, 0.25, 0.04, 0.02, False)
+    assert all(abs(vectorized[name] - greeks[name]) < 1e-12 for name in GREEKS)
+    print("norm_cdf matches scipy.stats.norm.cdf")
+
+    # Repeated revaluations with a cache are lookups, and stay exact
+    put.cache = BSMCache(maxsize = 2)
+    first = put.value()
+    assert put.value() == first == put.compute_greeks()['value']
+    put.s = 101
+    assert put.value() == put.compute_greeks()['value']
+    print(put.cache)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 18:05:37 2026
+
+@author: Tan Aydemir
+@email: taydemir@bu.edu
+
+This program builds an implied volatility surface for one underlying from
+an option chain. The implied volatilities of the whole chain are solved in
+one batch, an SVI smile is fitted to each expiry, and the smiles are joined
+by linear interpolation in total variance. The surface is then evaluated
+once on a (log-moneyness x time) grid, so sigma(strike, t) lookups are
+vectorized bilinear interpolations that never re-solve or re-fit.
+
+"""
+import numpy as np
+import pandas as pd
+from scipy.optimize import least_squares
+from bsm_option import BSMEuroCallOption, BSMEuroPutOption, bsm_value_and_delta
+from bsm_analysis import implied_volatility_chain
+
+
+def svi_total_variance(k, a, b, rho, m, sigma):
+    """
+    Evaluate the raw SVI parameterization of total implied variance
+    w(k) = a + b * (rho * (k - m) + sqrt((k - m)^2 + sigma^2)) at the
+    log-moneyness k (a scalar or np.array)
+    """
+    return a + b * (rho * (k - m) + np.sqrt((k - m) ** 2 + sigma ** 2))
+
+
+def fit_svi(k, w):
+    """
+    Fit the SVI parameters (a, b, rho, m, sigma) of one expiry by least
+    squares on total variance. With fewer than five quotes the smile is
+    taken to be flat.
+    """
+    if len(k) < 5:
+        return np.array([np.mean(w), 0, 0, 0, 0.1])
+    wMax = np.max(w)
+    start = [np.min(w), 0.1, -0.3, 0, 0.1]
+    bounds = ([-wMax, 0, -0.999, np.min(k) - 1, 1e-4],
+              [wMax, 10, 0.999, np.max(k) + 1, 5])
+    fit = least_squares(lambda p: svi_total_variance(k, *p) - w, start, bounds = bounds)
+    return fit.x
+
+
+class VolatilitySurface:
+    """
+    An implied volatility surface built from an option chain. The chain is
+    a pd.DataFrame with columns x (strike), t (years to expiry), price and
+    call (True for calls, False for puts).
+    """
+    # Columns of the per-expiry SVI parameter table
+    svi_params = ['a', 'b', 'rho', 'm', 'sigma']
+
+    def __init__(self, chain, s, rf = 0, div = 0, num_strikes = 201, num_times = 101):
+        """
+        Initialize the VolatilitySurface: solve the implied volatilities,
+        fit the smiles and evaluate the lookup grid
+        """
+        self.s = s
+        self.rf = rf
+        self.div = div
+        self.chain = chain.copy()
+        self.solve()
+        self.fit()
+        self.build_grid(num_strikes, num_times)
+
+    def __repr__(self):
+        """
+        Create a nicely-formatted representation of the VolatilitySurface instance.
+        """
+        newstr = f"VolatilitySurface (s = ${self.s:.2f}, rf = {self.rf:.3f}, div = {self.div}, "
+        newstr += f"{len(self.chain)} quotes, {len(self.params)} expiries)"
+        return newstr
+
+    @classmethod
+    def from_csv(cls, filename, s, rf = 0, div = 0, **kwargs):
+        """
+        Create a VolatilitySurface from an option chain CSV file with columns
+        x, t, price and call. The call column may hold booleans or
+        'call'/'put' (or 'C'/'P') labels.
+        """
+        chain = pd.read_csv(filename)
+        if not pd.api.types.is_bool_dtype(chain['call']):
+            chain['call'] = chain['call'].str.strip().str.lower().str.startswith('c')
+        return cls(chain, s, rf, div, **kwargs)
+
+    def forward(self, t):
+        """
+        Return the forward price of the underlying for the time(s) t
+        """
+        return self.s * np.exp((self.rf - self.div) * np.asarray(t, dtype = float))
+
+    def solve(self):
+        """
+        Solve the implied volatility of every quote in the chain in one batch,
+        and add the iv, log-moneyness k and total variance w columns
+        """
+        chain = self.chain
+        chain['iv'] = implied_volatility_chain(chain['price'], self.s, chain['x'], chain['t'],
+                                               self.rf, self.div, chain['call'].to_numpy(dtype = bool))
+        chain['k'] = np.log(chain['x'] / self.forward(chain['t']))
+        chain['w'] = chain['iv'] ** 2 * chain['t']
+
+    def fit(self):
+        """
+        Fit an SVI smile to each expiry. The parameters are kept in the
+        pd.DataFrame self.params, indexed by time to expiry.
+        """
+        quotes = self.chain.dropna(subset = ['iv'])
+        fits = {t: fit_svi(group['k'].to_numpy(), group['w'].to_numpy())
+                for t, group in quotes.groupby('t')}
+        self.params = pd.DataFrame.from_dict(fits, orient = 'index', columns = self.svi_params)
+        self.params.index.name = 't'
+
+    def total_variance(self, k, t):
+        """
+        Return the total implied variance at log-moneyness k and time t
+        (broadcast np.arrays). Between expiries the smiles are interpolated
+        linearly in total variance at fixed k; before the first and after
+        the last expiry the total variance scales with t.
+        """
+        k, t = np.broadcast_arrays(np.asarray(k, dtype = float), np.asarray(t, dtype = float))
+        expiries = self.params.index.to_numpy()
+        params = self.params.to_numpy()
+
+        # The bracketing expiries of each t, and the weight of the later one
+        if len(expiries) > 1:
+            upper = np.clip(np.searchsorted(expiries, t), 1, len(expiries) - 1)
+        else:
+            upper = np.zeros(t.shape, dtype = int)
+        lower = np.maximum(upper - 1, 0)
+        wLower = svi_total_variance(k, *np.moveaxis(params[lower], -1, 0))
+        wUpper = svi_total_variance(k, *np.moveaxis(params[upper], -1, 0))
+
+        tLower, tUpper = expiries[lower], expiries[upper]
+        span = np.where(tUpper > tLower, tUpper - tLower, 1)
+        weight = np.clip((t - tLower) / span, 0, 1)
+        w = wLower + weight * (wUpper - wLower)
+
+        # Scale the total variance outside the range of expiries
+        w = np.where(t < expiries[0], wLower * t / expiries[0], w)
+        return np.where(t > expiries[-1], wUpper * t / expiries[-1], w)
+
+    def build_grid(self, num_strikes = 201, num_times = 101):
+        """
+        Evaluate the implied volatility on a (log-moneyness x time) grid
+        covering the quotes (from half the first expiry to the last),
+        which sigma() interpolates
+        """
+        quotes = self.chain.dropna(subset = ['iv'])
+        self.grid_k = np.linspace(quotes['k'].min(), quotes['k'].max(), num_strikes)
+        self.grid_t = np.linspace(self.params.index[0] / 2, self.params.index[-1], num_times)
+        w = self.total_variance(self.grid_k[:, None], self.grid_t[None, :])
+        self.grid_vol = np.sqrt(np.maximum(w, 0) / self.grid_t)
+
+    def sigma(self, strike, t):
+        """
+        Look up the implied volatility for the strike(s) and time(s) t by
+        bilinear interpolation on the cached grid. Points outside the grid
+        take the value at its edge.
+        """
+        strike, t = np.broadcast_arrays(np.asarray(strike, dtype = float),
+                                        np.asarray(t, dtype = float))
+        k = np.log(strike / self.forward(t))
+
+        # Grid cell and position inside it along each axis
+        def locate(grid, values):
+            step = grid[1] - grid[0]
+            pos = np.clip((values - grid[0]) / step, 0, len(grid) - 1)
+            index = np.minimum(pos.astype(int), len(grid) - 2)
+            return index, pos - index
+
+        i, fk = locate(self.grid_k, k)
+        j, ft = locate(self.grid_t, t)
+        vol = self.grid_vol
+        return ((1 - fk) * (1 - ft) * vol[i, j] + fk * (1 - ft) * vol[i + 1, j]
+                + (1 - fk) * ft * vol[i, j + 1] + fk * ft * vol[i + 1, j + 1])
+
+    def option(self, strike, t, call = True):
+        """
+        Create a BSMEuroCallOption (or BSMEuroPutOption) for the strike and
+        time t, priced with the volatility of the surface
+        """
+        cls = BSMEuroCallOption if call else BSMEuroPutOption
+        return cls(self.s, strike, t, float(self.sigma(strike, t)), self.rf, self.div)
+
+
+if __name__ == '__main__':
+    import time
+
+    # A synthetic chain priced from a known skewed smile
+    s, rf, div = 100, 0.04, 0.01
+    strikes = np.arange(60, 145, 5.0)
+    expiries = np.array([1 / 12, 0.25, 0.5, 1, 2])
+    x, t = [a.ravel() for a in np.meshgrid(strikes, expiries)]
+    k = np.log(x / (s * np.exp((rf - div) * t)))
+    trueVol = 0.2 - 0.1 * k + 0.15 * k ** 2 + 0.02 * np.sqrt(t)
+    call = x >= s
+    price, delta = bsm_value_and_delta(s, x, t, trueVol, rf, div, call)
+    chain = pd.DataFrame({'x': x, 't': t, 'price': price, 'call': call})
+
+    surface = VolatilitySurface(chain, s, rf, div)
+    print(surface)
+    print(surface.params)
+    print("Max vol error at the quotes:", np.max(np.abs(surface.sigma(x, t) - trueVol)))
+
+    # Lookups for a large batch of random points
+    rng = np.random.default_rng(0)
+    n = 1000000
+    qStrikes = rng.uniform(70, 130, n)
+    qTimes = rng.uniform(0.1, 2, n)
+    start = time.time()
+    vols = surface.sigma(qStrikes, qTimes)
+    print(f"{n / (time.time() - start):,.0f} lookups per second")
+    print(surface.option(105, 0.75))
@@ -29,6 +29,64 @@ def compute_drawdown(prices):
     df['dd_pct'] = df['dd_dollars'] / df['prev_max']
     return df
     
+def compute_panel_drawdown(prices):
+    """
+    Compute drawdown statistics for every column of a (dates x symbols)
+    pd.DataFrame of prices in one vectorized pass. Return a pd.DataFrame with
+    one row per symbol: the max drawdown, its peak, trough and recovery dates,
+    and the longest and current underwater durations (in bars).
+    """
+    values = prices.to_numpy(dtype = float)
+    num_dates, num_cols = values.shape
+    rows = np.arange(num_dates)[:, None]
+    cols = np.arange(num_cols)
+    
+    # Previous maximum of every column (fmax skips missing prices)
+    prev_max = np.fmax.accumulate(values, axis = 0)
+    with np.errstate(invalid = 'ignore'):
+        dd_pct = (prev_max - values) / prev_max
+    dd_pct = np.nan_to_num(dd_pct, nan = 0.0)
+    
+    # Dates on or after each symbol's first price, and symbols with any price
+    listed = ~np.isnan(prev_max)
+    has_prices = listed[-1]
+    
+    # Row of the most recent peak at every date
+    at_peak = values >= prev_max
+    peak_row = np.maximum.accumulate(np.where(at_peak, rows, 0), axis = 0)
+    
+    # The max drawdown, its trough and the peak it fell from. Dates before
+    # the first price can not be the trough.
+    trough_row = np.argmax(np.where(listed, dd_pct, -1), axis = 0)
+    max_dd_pct = np.where(has_prices, dd_pct[trough_row, cols], np.nan)
+    max_peak_row = peak_row[trough_row, cols]
+    peak_price = values[max_peak_row, cols]
+    
+    # Largest dollar drawdown (as in compute_drawdown's dd_dollars column);
+    # fmax skips the NaNs of missing prices without warning
+    max_dd_dollars = np.fmax.reduce(prev_max - values, axis = 0)
+    
+    # Recovery: first date after the trough that regains the peak price
+    recovered = (rows > trough_row) & (values >= peak_price)
+    recovery_row = np.argmax(recovered, axis = 0)
+    has_recovered = recovered[recovery_row, cols] & (max_dd_pct > 0)
+    
+    # Underwater duration: bars elapsed since the most recent peak, 0 before
+    # the first price
+    underwater = np.where(listed, rows - peak_row, 0)
+    
+    dates = prices.index
+    df = pd.DataFrame(index = prices.columns)
+    df['max_dd_pct'] = max_dd_pct
+    df['max_dd_dollars'] = max_dd_dollars
+    df['peak_date'] = dates[max_peak_row].where(has_prices)
+    df['trough_date'] = dates[trough_row].where(has_prices)
+    df['recovery_date'] = dates[recovery_row].where(has_recovered)
+    df['max_duration'] = underwater.max(axis = 0)
+    df['current_dd_pct'] = dd_pct[-1]
+    df['current_duration'] = underwater[-1]
+    return df
+
 def plot_drawdown(df):
     """
     Create and show two charts:
@@ -52,6 +110,108 @@ def plot_drawdown(df):
     # Show plot
     plt.show()
 
+class DrawdownTracker:
+    """
+    Track drawdowns incrementally for one or more price series. Only the
+    running state (peak, trough, current/max drawdown and durations) is kept
+    per symbol, so each update costs O(1) per symbol and bar no matter how
+    long the history is.
+    """
+    def __init__(self, symbols = 1):
+        """
+        Initialize a DrawdownTracker instance. symbols is either the number
+        of series to track or a list of their labels.
+        """
+        if isinstance(symbols, (int, np.integer)):
+            symbols = list(range(symbols))
+        self.symbols = list(symbols)
+        n = len(self.symbols)
+        
+        self.peak = np.full(n, np.nan)
+        self.trough = np.full(n, np.nan)
+        self.last_price = np.full(n, np.nan)
+        self.dd_pct = np.zeros(n)
+        self.max_dd_pct = np.zeros(n)
+        self.duration = np.zeros(n, dtype = int)
+        self.max_duration = np.zeros(n, dtype = int)
+        self.num_bars = 0
+        
+    def __repr__(self):
+        """
+        Display the well-formatted DrawdownTracker instance.
+        """
+        newstr = f"DrawdownTracker (symbols={len(self.symbols)}, bars={self.num_bars}, "
+        newstr += f"worst max drawdown={np.max(self.max_dd_pct, initial = 0):.2%})"
+        return newstr
+    
+    def update(self, prices):
+        """
+        Consume the next bar (one price per symbol) or a micro-batch of bars
+        (a bars x symbols array) and update the drawdown state. NaN prices
+        are treated as missing and leave the peak and trough unchanged.
+        """
+        prices = np.asarray(prices, dtype = float)
+        if prices.ndim < 2:
+            prices = prices.reshape(1, -1)
+        num_bars = len(prices)
+        if num_bars == 0:
+            return self
+        
+        # Running peak across the batch, seeded with the stored peak.
+        # fmax ignores NaN, so missing prices and the empty state carry over.
+        running_peak = np.fmax.accumulate(np.vstack([self.peak, prices]), axis = 0)[1:]
+        
+        # Drawdown since the running peak at every bar of the batch
+        with np.errstate(invalid = 'ignore'):
+            dd_pct = (running_peak - prices) / running_peak
+        
+        # Bar number (1-based) of the latest new peak within the batch, 0 if none
+        bar = np.arange(1, num_bars + 1)[:, None]
+        at_peak = prices >= running_peak
+        last_peak = np.maximum.accumulate(np.where(at_peak, bar, 0), axis = 0)
+        
+        # Bars spent below the peak: since the last new peak in the batch,
+        # otherwise extending the duration carried in from previous updates
+        has_peak = ~np.isnan(running_peak)
+        duration = np.where(last_peak > 0, bar - last_peak, self.duration + bar)
+        duration = np.where(has_peak, duration, 0)
+        
+        # Trough since the current peak: only bars at or after it count
+        after_peak = bar >= last_peak[-1]
+        batch_trough = np.where(after_peak & ~np.isnan(prices), prices, np.inf).min(axis = 0)
+        self.trough = np.where(last_peak[-1] > 0, batch_trough, np.fmin(self.trough, batch_trough))
+        self.trough[np.isinf(self.trough)] = np.nan
+        
+        # Last observed price per symbol (ignoring NaN bars)
+        seen = ~np.isnan(prices)
+        last_seen = np.maximum.accumulate(np.where(seen, bar, 0), axis = 0)[-1]
+        cols = np.arange(prices.shape[1])
+        self.last_price = np.where(last_seen > 0, prices[np.maximum(last_seen - 1, 0), cols], self.last_price)
+        
+        self.peak = running_peak[-1]
+        self.dd_pct = np.where(has_peak[-1], (self.peak - self.last_price) / self.peak, 0)
+        self.max_dd_pct = np.fmax(self.max_dd_pct, np.nanmax(np.where(seen, dd_pct, 0), axis = 0))
+        self.duration = duration[-1]
+        self.max_duration = np.maximum(self.max_duration, duration.max(axis = 0))
+        self.num_bars += num_bars
+        return self
+    
+    def summary(self):
+        """
+        Return a pd.DataFrame (one row per symbol) with the current drawdown
+        state.
+        """
+        df = pd.DataFrame(index = self.symbols)
+        df['last_price'] = self.last_price
+        df['peak'] = self.peak
+        df['trough'] = self.trough
+        df['dd_dollars'] = self.peak - self.last_price
+        df['dd_pct'] = self.dd_pct
+        df['max_dd_pct'] = self.max_dd_pct
+        df['duration'] = self.duration
+        df['max_duration'] = self.max_duration
+        return df
+
 def run_mc_drawdown_trials(init_price, years, r, sigma, trial_size, num_trials):
     """
     Use the Monte Carlo Stock simulation to to simulate the
@@ -78,6 +238,53 @@ def run_mc_drawdown_trials(init_price, years, r, sigma, trial_size, num_trials):
     return pd.Series(max_drawdowns)
 
 
+def run_mc_portfolio_drawdown_trials(prices, target_weights, rebalance_freq, years, trial_size, num_trials, initial_value = 10000):
+    """
+    Use Monte Carlo simulation to find the distribution of max drawdowns of a
+    multi-asset portfolio. Correlated log returns are drawn from the mean and
+    covariance of the historical prices, and the portfolio is rebalanced to
+    target_weights every rebalance_freq periods, as in
+    create_rebalanced_portfolio (None means buy-and-hold). All trials are
+    simulated at once as arrays.
+    """
+    
+    # Historical per-period log return mean and covariance
+    log_ret = np.log(prices / prices.shift(1)).dropna()
+    mu = log_ret.mean().to_numpy()
+    cov = log_ret.cov().to_numpy()
+    weights = np.array([target_weights[key] for key in prices.columns], dtype = float)
+    
+    num_steps = int(trial_size * years)
+    if not rebalance_freq:
+        rebalance_freq = num_steps
+    num_blocks = -(-num_steps // rebalance_freq)
+    
+    # Correlated returns for every trial, step and asset. The last block is
+    # padded with zero returns, which are trimmed off below.
+    chol = np.linalg.cholesky(cov)
+    z = np.random.normal(size = (num_trials, num_blocks * rebalance_freq, len(weights)))
+    sim_ret = mu + z @ chol.T
+    sim_ret[:, num_steps:] = 0
+    
+    # Within a rebalancing block the share counts are fixed, so the portfolio
+    # grows by the target-weighted sum of each asset's growth since the block start
+    sim_ret = sim_ret.reshape(num_trials, num_blocks, rebalance_freq, len(weights))
+    growth = np.exp(np.cumsum(sim_ret, axis = 2)) @ weights
+    
+    # Portfolio value at the start of each block (after rebalancing)
+    block_start = np.ones((num_trials, num_blocks))
+    block_start[:, 1:] = np.cumprod(growth[:, :-1, -1], axis = 1)
+    values = initial_value * (block_start[:, :, None] * growth).reshape(num_trials, -1)[:, :num_steps]
+    values = np.hstack([np.full((num_trials, 1), initial_value * weights.sum()), values])
+    
+    # Max drawdown since the previous maximum, for every trial
+    prev_max = np.maximum.accumulate(values, axis = 1)
+    max_drawdowns = np.max((prev_max - values) / prev_max, axis = 1)
+    
+    # Create and return the resulting array as a Pandas Series
+    return pd.Series(max_drawdowns)
+
+
 if __name__ == '__main__':
     df = pd.read_csv('SPY.csv')
     df['ret'] = np.log(df['Adj Close'] / df['Adj Close'].shift(1))    
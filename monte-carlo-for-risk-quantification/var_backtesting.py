@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:12:31 2026
+
+@author: Tan Aydemir
+@email: taydemir@bu.edu
+
+This program backtests the VaR models of var_calculations.py against realized
+returns. Rolling VaR forecasts, exception series, the Kupiec proportion of
+failures (POF) test and the Christoffersen independence test are all computed
+as array operations over (dates x portfolios x confidence levels), so many
+books and confidence levels are backtested in a single batch.
+"""
+import scipy.stats
+import scipy.special
+import numpy as np
+import pandas as pd
+
+
+def _as_panel(returns):
+    """
+    Convert a pd.Series, pd.DataFrame or np.array of returns into a 2-d
+    (dates x portfolios) np.array, along with the portfolio labels.
+    """
+    if isinstance(returns, pd.DataFrame):
+        return returns.to_numpy(dtype = float), returns.columns
+    if isinstance(returns, pd.Series):
+        return returns.to_numpy(dtype = float)[:, None], pd.Index([returns.name])
+    returns = np.asarray(returns, dtype = float)
+    if returns.ndim == 1:
+        returns = returns[:, None]
+    return returns, pd.RangeIndex(returns.shape[1])
+
+
+def compute_rolling_historical_var_pct(returns, x, n = 1, window = 250, chunk_size = 256):
+    """
+    Compute rolling historical-simulation VaR forecasts (as a percentage) for
+    every portfolio and confidence level. The forecast for date t only uses
+    the window returns before t. Returns a np.array shaped
+    (dates x portfolios x confidence levels), NaN where there is no full window.
+    """
+    returns, _ = _as_panel(returns)
+    levels = np.atleast_1d(np.asarray(x, dtype = float))
+    num_dates, num_ports = returns.shape
+
+    var = np.full((num_dates, num_ports, len(levels)), np.nan)
+    if num_dates <= window:
+        return var
+
+    # Each window is a view into returns; only chunk_size windows are
+    # materialized by the quantile at a time, which bounds memory.
+    windows = np.lib.stride_tricks.sliding_window_view(returns[:-1], window, axis = 0)
+    quantile = np.nanquantile if np.isnan(returns).any() else np.quantile
+    for start in range(0, len(windows), chunk_size):
+        block = windows[start:start + chunk_size]
+        q = quantile(block, 1 - levels, axis = -1)
+        var[window + start:window + start + len(block)] = np.moveaxis(q, 0, -1)
+
+    # Scale the 1-day quantile to an n-day VaR
+    return var * (n ** 0.5)
+
+
+def compute_rolling_model_var_pct(returns, x, n = 1, window = 250, min_periods = None):
+    """
+    Compute rolling model-based (normal) VaR forecasts (as a percentage) for
+    every portfolio and confidence level, using the mean and standard
+    deviation of the window returns before each date. Missing returns are
+    skipped; a forecast is NaN only when its window has fewer than
+    min_periods valid returns (half the window by default). Returns a
+    np.array shaped (dates x portfolios x confidence levels).
+    """
+    returns, _ = _as_panel(returns)
+    levels = np.atleast_1d(np.asarray(x, dtype = float))
+    z = scipy.stats.norm.ppf(1 - levels)
+    if min_periods is None:
+        min_periods = window // 2
+    
+    # Rolling sums from cumulative sums: O(1) work per date and portfolio.
+    # Missing returns add 0 to the sums and are left out of the counts.
+    valid = ~np.isnan(returns)
+    filled = np.where(valid, returns, 0.0)
+    zeros = np.zeros((1, returns.shape[1]))
+    sums = np.concatenate([zeros, np.cumsum(filled, axis = 0)])
+    sq_sums = np.concatenate([zeros, np.cumsum(filled ** 2, axis = 0)])
+    counts = np.concatenate([zeros, np.cumsum(valid, axis = 0)])
+    win_sum = sums[window:-1] - sums[:-window - 1]
+    win_sq_sum = sq_sums[window:-1] - sq_sums[:-window - 1]
+    win_count = counts[window:-1] - counts[:-window - 1]
+    
+    enough = win_count >= max(min_periods, 2)
+    count = np.where(enough, win_count, np.nan)
+    mu = win_sum / count
+    sigma = np.sqrt(np.maximum(win_sq_sum - count * mu ** 2, 0) / (count - 1))
+    
+    var = np.full(returns.shape + (len(levels),), np.nan)
+    var[window:] = mu[..., None] * n + z * sigma[..., None] * (n ** 0.5)
+    return var
+
+
+def compute_var_exceptions(returns, var):
+    """
+    Flag the dates where the realized return fell below the VaR forecast.
+    var is shaped (dates x portfolios x confidence levels). Returns a float
+    np.array of the same shape holding 1 (exception), 0 (no exception) or
+    NaN where there is no forecast or no realized return.
+    """
+    returns, _ = _as_panel(returns)
+    var = np.asarray(var, dtype = float)
+    realized = returns[..., None]
+    exceptions = (realized < var).astype(float)
+    exceptions[np.isnan(var) | np.isnan(np.broadcast_to(realized, var.shape))] = np.nan
+    return exceptions
+
+
+def kupiec_pof_test(exceptions, x):
+    """
+    Compute the Kupiec proportion of failures likelihood ratio for every
+    portfolio and confidence level (time runs along axis 0). Returns the
+    number of observations, number of exceptions, the LR statistic and its
+    chi-squared(1) p-value.
+    """
+    levels = np.atleast_1d(np.asarray(x, dtype = float))
+    p = 1 - levels
+    num_obs = np.sum(~np.isnan(exceptions), axis = 0)
+    num_exc = np.nansum(exceptions, axis = 0)
+
+    # Observed exception rate
+    rate = np.divide(num_exc, num_obs, out = np.zeros(num_exc.shape), where = num_obs > 0)
+
+    # xlogy treats 0 * log(0) as 0, covering the no-exception case
+    log_null = scipy.special.xlogy(num_obs - num_exc, 1 - p) + scipy.special.xlogy(num_exc, p)
+    log_alt = scipy.special.xlogy(num_obs - num_exc, 1 - rate) + scipy.special.xlogy(num_exc, rate)
+    lr = -2 * (log_null - log_alt)
+    return num_obs, num_exc, lr, scipy.stats.chi2.sf(lr, 1)
+
+
+def christoffersen_independence_test(exceptions):
+    """
+    Compute the Christoffersen independence likelihood ratio for every
+    portfolio and confidence level (time runs along axis 0), based on the
+    first-order transition counts of the exception series. Returns the LR
+    statistic and its chi-squared(1) p-value.
+    """
+    prev = exceptions[:-1]
+    curr = exceptions[1:]
+
+    # Comparisons with NaN are False, so pairs with a missing day drop out
+    n00 = np.sum((prev == 0) & (curr == 0), axis = 0)
+    n01 = np.sum((prev == 0) & (curr == 1), axis = 0)
+    n10 = np.sum((prev == 1) & (curr == 0), axis = 0)
+    n11 = np.sum((prev == 1) & (curr == 1), axis = 0)
+
+    def ratio(num, den):
+        return np.divide(num, den, out = np.zeros(num.shape), where = den > 0)
+
+    pi0 = ratio(n01, n00 + n01)
+    pi1 = ratio(n11, n10 + n11)
+    pi = ratio(n01 + n11, n00 + n01 + n10 + n11)
+
+    xlogy = scipy.special.xlogy
+    log_null = xlogy(n00 + n10, 1 - pi) + xlogy(n01 + n11, pi)
+    log_alt = (xlogy(n00, 1 - pi0) + xlogy(n01, pi0)
+               + xlogy(n10, 1 - pi1) + xlogy(n11, pi1))
+    lr = -2 * (log_null - log_alt)
+    return lr, scipy.stats.chi2.sf(lr, 1)
+
+
+def backtest_var(returns, var, x):
+    """
+    Backtest VaR forecasts (dates x portfolios x confidence levels) against
+    realized returns. Return a pd.DataFrame indexed by (portfolio, confidence)
+    with the exception counts, the Kupiec POF and Christoffersen independence
+    tests and the combined conditional coverage test.
+    """
+    _, labels = _as_panel(returns)
+    levels = np.atleast_1d(np.asarray(x, dtype = float))
+    exceptions = compute_var_exceptions(returns, var)
+
+    num_obs, num_exc, lr_pof, p_pof = kupiec_pof_test(exceptions, levels)
+    lr_ind, p_ind = christoffersen_independence_test(exceptions)
+    lr_cc = lr_pof + lr_ind
+
+    index = pd.MultiIndex.from_product([labels, levels], names = ['portfolio', 'confidence'])
+    df = pd.DataFrame(index = index)
+    df['num_obs'] = num_obs.ravel()
+    df['num_exceptions'] = num_exc.ravel()
+    df['exception_rate'] = (num_exc / np.maximum(num_obs, 1)).ravel()
+    df['expected_rate'] = np.broadcast_to(1 - levels, num_obs.shape).ravel()
+    df['kupiec_lr'] = lr_pof.ravel()
+    df['kupiec_pvalue'] = p_pof.ravel()
+    df['christoffersen_lr'] = lr_ind.ravel()
+    df['christoffersen_pvalue'] = p_ind.ravel()
+    df['conditional_coverage_lr'] = lr_cc.ravel()
+    df['conditional_coverage_pvalue'] = scipy.stats.chi2.sf(lr_cc, 2).ravel()
+    return df
+
+
+if __name__ == '__main__':
+    df = pd.read_csv('SPY.csv')
+    df.index = pd.to_datetime(df['Date'])
+    returns = (df['Adj Close'] / df['Adj Close'].shift(1) - 1).dropna()
+    levels = [0.95, 0.98, 0.99]
+    var = compute_rolling_historical_var_pct(returns, levels, 1, 250)
+    print(backtest_var(returns, var, levels))
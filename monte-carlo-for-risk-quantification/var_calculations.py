@@ -36,6 +36,54 @@ def compute_historical_var_pct(returns, x, n):
     # Return the value as a floating point number
     return float(n_day_var)
 
+def compute_model_var_decomposition(mu, cov, weights, x, n):
+    """
+    Decompose the model-based VaR of a portfolio into marginal, component
+    and incremental VaR for every asset. mu is the vector of mean asset
+    returns, cov the covariance matrix of asset returns and weights the
+    portfolio holdings (as fractions of the portfolio or in dollars).
+    """
+    z = scipy.stats.norm.ppf(1 - x)
+    
+    # Keep the asset labels if mu/cov/weights came in as Pandas objects
+    labels = None
+    for obj in (weights, mu, cov):
+        if isinstance(obj, (pd.Series, pd.DataFrame)):
+            labels = obj.index
+            break
+    
+    mu = np.asarray(mu, dtype = float)
+    cov = np.asarray(cov, dtype = float)
+    weights = np.asarray(weights, dtype = float)
+    
+    # One covariance-weight product serves every asset: cov_w[i] = cov(r_i, r_p)
+    cov_w = cov @ weights
+    port_variance = weights @ cov_w
+    port_sigma = np.sqrt(port_variance)
+    port_var = weights @ mu * n + z * port_sigma * (n ** 0.5)
+    
+    # Marginal VaR is the gradient of VaR w.r.t. each weight
+    marginal_var = mu * n + z * (cov_w / port_sigma) * (n ** 0.5)
+    
+    # Component VaR sums to the portfolio VaR (Euler allocation)
+    component_var = weights * marginal_var
+    
+    # Incremental VaR: VaR of the full portfolio less VaR without the asset.
+    # The variance without asset i follows from the same cov_w, so no asset
+    # needs to be revalued on its own.
+    reduced_variance = port_variance - 2 * weights * cov_w + weights ** 2 * np.diag(cov)
+    reduced_sigma = np.sqrt(np.maximum(reduced_variance, 0))
+    reduced_var = (weights @ mu - weights * mu) * n + z * reduced_sigma * (n ** 0.5)
+    incremental_var = port_var - reduced_var
+    
+    df = pd.DataFrame(index = labels)
+    df['weight'] = weights
+    df['marginal_var'] = marginal_var
+    df['component_var'] = component_var
+    df['pct_contribution'] = component_var / port_var
+    df['incremental_var'] = incremental_var
+    return df
+
 if __name__ == '__main__':
     df = pd.read_csv('SPY.csv')
     df.index = pd.to_datetime(df['Date'])